@@ -3,11 +3,20 @@
 from __future__ import annotations
 
 import argparse
+import json
 import sys
 from pathlib import Path
 from typing import Callable, Tuple
 
-from pyteal import Mode, OptimizeOptions, compileTeal
+# PyTeal only records where each expression was built if the source-map gate is
+# on before pyteal is imported, so the flag is checked here, ahead of parsing.
+SOURCEMAP_REQUESTED = __name__ == "__main__" and "--sourcemap" in sys.argv[1:]
+if SOURCEMAP_REQUESTED:
+    from feature_gates import FeatureGates
+
+    FeatureGates.set_sourcemap_enabled(True)
+
+from pyteal import Compilation, Mode, OptimizeOptions, compileTeal  # noqa: E402
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 SRC_ROOT = PROJECT_ROOT / "src"
@@ -15,10 +24,12 @@ if str(SRC_ROOT) not in sys.path:
     sys.path.insert(0, str(SRC_ROOT))
 
 from algo_flow_contracts.execution.contract import (  # type: ignore  # noqa: E402
+    OPTIMIZE_OPTIONS as execution_optimize,
     approval_program as execution_approval,
     clear_state_program as execution_clear,
 )
 from algo_flow_contracts.intent_storage.contract import (  # type: ignore  # noqa: E402
+    OPTIMIZE_OPTIONS as storage_optimize,
     approval_program as storage_approval,
     clear_state_program as storage_clear,
 )
@@ -32,16 +43,51 @@ CONTRACTS: dict[str, ContractPair] = {
     "intent_storage": (storage_approval, storage_clear),
 }
 
+OPTIMIZE_OPTIONS: dict[str, OptimizeOptions] = {
+    "execution": execution_optimize,
+    "intent_storage": storage_optimize,
+}
+
 
-def compile_pair(name: str, pair: ContractPair, version: int, opts: OptimizeOptions, assemble: bool) -> None:
-    approval_fn, clear_fn = pair
-    approval_teal = compileTeal(
-        approval_fn(),
-        mode=Mode.Application,
+def compile_approval_with_sourcemap(
+    approval, version: int, opts: OptimizeOptions, assemble: bool, teal_filename: str
+) -> Tuple[str, str, dict]:
+    """Compile ``approval`` and return its TEAL, the TEAL annotated with the
+    PyTeal line behind each op, and the R3 source map as JSON."""
+    result = Compilation(
+        approval,
+        Mode.Application,
         version=version,
-        assembleConstants=assemble,
+        assemble_constants=assemble,
         optimize=opts,
-    )
+    ).compile(with_sourcemap=True, teal_filename=teal_filename, annotate_teal=True)
+    sourcemap = result.sourcemap
+    return result.teal, sourcemap.annotated_teal, sourcemap.r3_sourcemap.to_json()
+
+
+def compile_pair(
+    name: str,
+    pair: ContractPair,
+    version: int,
+    opts: OptimizeOptions,
+    assemble: bool,
+    sourcemap: bool = False,
+) -> None:
+    approval_fn, clear_fn = pair
+    approval_name = f"{name}_approval_v{version}.teal"
+    annotated_teal = None
+    if sourcemap:
+        approval_teal, annotated_teal, sourcemap_json = compile_approval_with_sourcemap(
+            approval_fn(), version, opts, assemble, approval_name
+        )
+    else:
+        approval_teal = compileTeal(
+            approval_fn(),
+            mode=Mode.Application,
+            version=version,
+            assembleConstants=assemble,
+            optimize=opts,
+        )
     clear_teal = compileTeal(
         clear_fn(),
         mode=Mode.Application,
@@ -51,7 +97,7 @@ def compile_pair(name: str, pair: ContractPair, version: int, opts: OptimizeOpti
     )
 
     BUILD_DIR.mkdir(parents=True, exist_ok=True)
-    approval_path = BUILD_DIR / f"{name}_approval_v{version}.teal"
+    approval_path = BUILD_DIR / approval_name
     clear_path = BUILD_DIR / f"{name}_clear_v{version}.teal"
     approval_path.write_text(approval_teal)
     clear_path.write_text(clear_teal)
@@ -59,6 +105,13 @@ def compile_pair(name: str, pair: ContractPair, version: int, opts: OptimizeOpti
     clear_bytes = len(clear_teal.encode())
     print(f"Wrote {approval_path} ({approval_bytes} bytes)")
     print(f"Wrote {clear_path} ({clear_bytes} bytes)")
+    if annotated_teal is not None:
+        annotated_path = BUILD_DIR / f"{name}_approval_v{version}.annotated.teal"
+        map_path = BUILD_DIR / f"{name}_approval_v{version}.map.json"
+        annotated_path.write_text(annotated_teal)
+        map_path.write_text(json.dumps(sourcemap_json))
+        print(f"Wrote {annotated_path}")
+        print(f"Wrote {map_path}")
 
 
 def main() -> None:
@@ -80,14 +133,18 @@ def main() -> None:
         action="append",
         help="Compile only the selected contract(s)",
     )
+    parser.add_argument(
+        "--sourcemap",
+        action="store_true",
+        help="Also write a source map and PyTeal-annotated TEAL for each approval program",
+    )
     args = parser.parse_args()
 
-    opts = OptimizeOptions(scratch_slots=True)
     assemble = not args.no_assemble
 
     names = args.contract if args.contract else sorted(CONTRACTS.keys())
     for name in names:
-        compile_pair(name, CONTRACTS[name], args.version, opts, assemble)
+        compile_pair(name, CONTRACTS[name], args.version, OPTIMIZE_OPTIONS[name], assemble, args.sourcemap)
 
 
 if __name__ == "__main__":
@@ -20,14 +20,14 @@ if load_dotenv_module is not None:
 else:
 	def load_dotenv(*_args, **_kwargs):  # type: ignore[override]
 		return False
-from pyteal import Mode, OptimizeOptions, compileTeal
+from pyteal import Mode, compileTeal
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 SRC_ROOT = PROJECT_ROOT / "src"
 if str(SRC_ROOT) not in sys.path:
 	sys.path.insert(0, str(SRC_ROOT))
 
-from compile_contracts import BUILD_DIR, CONTRACTS  # type: ignore  # noqa: E402
+from compile_contracts import BUILD_DIR, CONTRACTS, OPTIMIZE_OPTIONS  # type: ignore  # noqa: E402
 
 ContractPair = Tuple[Callable[[], object], Callable[[], object]]
 
@@ -51,7 +51,7 @@ MAX_EXTRA_PAGES = 2
 
 
 def compile_sources(name: str, pair: ContractPair, version: int, assemble: bool) -> Tuple[str, str]:
-	opts = OptimizeOptions(scratch_slots=True)
+	opts = OPTIMIZE_OPTIONS[name]
 	approval_fn, clear_fn = pair
 	approval_teal = compileTeal(
 		approval_fn(),
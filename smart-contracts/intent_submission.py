@@ -5,14 +5,16 @@ from __future__ import annotations
 
 import argparse
 import base64
-import copy
+import functools
 import hashlib
-import importlib
+import importlib.util
 import json
 import os
+import struct
 import sys
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 from typing import Iterable, Optional, Sequence
 
 from algosdk import account, encoding, mnemonic, transaction as sdk_txn
@@ -24,7 +26,6 @@ from algosdk.atomic_transaction_composer import (
 from algosdk.abi import ABIType
 from algosdk.logic import get_application_address
 from algosdk.v2client import algod
-from pyteal import abi
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 SRC_ROOT = PROJECT_ROOT / "src"
@@ -37,8 +38,24 @@ INTENT_RECORD_ABI = ABIType.from_string(
     "(address,uint64,byte[32],uint64,byte[],address,uint64,byte[],uint64,uint64)"
 )
 UINT64_ABI = ABIType.from_string("uint64")
-
-from algo_flow_contracts.common import abi_types, constants, opcodes  # noqa: E402
+# Fixed part of one encoded WorkflowStep: six uint64 fields, the offset of ``extra`` and its length.
+_WORKFLOW_STEP_PREFIX = struct.Struct(">6QHH")
+_UINT16 = struct.Struct(">H")
+_BOX_KEY_STRUCT = struct.Struct(">Q")
+
+from algo_flow_contracts.common import constants, opcodes  # noqa: E402
+
+_KEY_B64 = {
+    name: base64.b64encode(getattr(constants, name)).decode()
+    for name in (
+        "G_KEEPER_LITERAL",
+        "G_MIN_COLLATERAL_LITERAL",
+        "G_EXECUTOR_APP_LITERAL",
+        "G_FEE_SPLIT_BPS_LITERAL",
+        "G_STORAGE_APP_LITERAL",
+        "G_NEXT_INTENT_LITERAL",
+    )
+}
 
 _dotenv_spec = importlib.util.find_spec("dotenv")
 if _dotenv_spec is not None:  # pragma: no cover
@@ -47,8 +64,27 @@ else:  # pragma: no cover
     def load_dotenv(*_args, **_kwargs):  # type: ignore[misc]
         return False
 
+def _hashlib_sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def _select_sha256():
+    """Prefer stringzilla.sha256, which first ships in StringZilla 4.2."""
+    if importlib.util.find_spec("stringzilla") is None:
+        return _hashlib_sha256
+    stringzilla_sha256 = getattr(importlib.import_module("stringzilla"), "sha256", None)
+    if stringzilla_sha256 is None:
+        return _hashlib_sha256
+    return stringzilla_sha256
+
+
+_sha256_digest = _select_sha256()
+
 
 DEFAULT_NOTE_PREFIX = b"AlgoFlow"
+NOTE_COLLATERAL = DEFAULT_NOTE_PREFIX + b"-collateral"
+NOTE_INTENT = DEFAULT_NOTE_PREFIX + b"-intent"
+NOTE_FUND = DEFAULT_NOTE_PREFIX + b"-fund"
 ZERO_ADDRESS = ""
 
 
@@ -62,7 +98,7 @@ class IntentConfig:
     fee_split_bps: int = 0
 
 
-@dataclass
+@dataclass(frozen=True)
 class WorkflowStepSpec:
     opcode: int
     target_app_id: int
@@ -72,6 +108,10 @@ class WorkflowStepSpec:
     slippage_bps: int
     extra: bytes
 
+    def __post_init__(self) -> None:
+        # Normalise bytearray/memoryview payloads so specs stay hashable.
+        object.__setattr__(self, "extra", bytes(self.extra))
+
 
 @dataclass
 class IntentTemplate:
@@ -86,11 +126,19 @@ class IntentTemplate:
 
 
 def load_env(path: str | None = None) -> dict[str, str]:
+    # The cached mapping is read-only; hand each caller its own copy.
+    return dict(_cached_env(path))
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_env(path: str | None) -> MappingProxyType:
     env_path = Path(path or PROJECT_ROOT / ".env")
     if env_path.exists():
         load_dotenv(str(env_path))  # type: ignore[arg-type]
     load_dotenv()
-    return {k: v for k, v in os.environ.items() if k.startswith("ALGOD_") or k.endswith("_APP_ID")}
+    return MappingProxyType(
+        {k: v for k, v in os.environ.items() if k.startswith("ALGOD_") or k.endswith("_APP_ID")}
+    )
 
 
 def load_static_config(path: Path = STATIC_CONFIG_PATH) -> dict[str, object]:
@@ -104,17 +152,21 @@ def algod_client(config: Optional[dict[str, str]] = None) -> algod.AlgodClient:
     config = config or load_env()
     address = config.get("ALGOD_ADDRESS", "https://testnet-api.algonode.cloud")
     token = config.get("ALGOD_TOKEN", "")
-    return algod.AlgodClient(token, address, headers={"User-Agent": "algosdk"})
+    return _cached_algod_client(address, token)
 
 
 def get_signer_from_env(config: Optional[dict[str, str]] = None) -> tuple[str, AccountTransactionSigner]:
     cfg = config or load_env()
-    mnemonic_phrase = cfg["ALGOD_ACCOUNT_MNEMONIC"]
-    private_key = mnemonic.to_private_key(mnemonic_phrase)
+    private_key = mnemonic.to_private_key(cfg["ALGOD_ACCOUNT_MNEMONIC"])
     addr = account.address_from_private_key(private_key)
     return addr, AccountTransactionSigner(private_key)
 
 
+@functools.lru_cache(maxsize=4)
+def _cached_algod_client(address: str, token: str) -> algod.AlgodClient:
+    return algod.AlgodClient(token, address, headers={"User-Agent": "algosdk"})
+
+
 def _fetch_app_params(client: algod.AlgodClient, app_id: int) -> dict:
     info = client.application_info(app_id)
     if "params" in info:
@@ -130,12 +182,65 @@ def ensure_storage_config(
     signer: AccountTransactionSigner,
     config: IntentConfig,
 ) -> Optional[str]:
+    composer = AtomicTransactionComposer()
+    if not _queue_storage_config(client, composer, signer_addr, signer, config):
+        return None
+
+    result = composer.execute(client, 4)
+    return result.tx_ids[0]
+
+
+def ensure_execution_config(
+    client: algod.AlgodClient,
+    signer_addr: str,
+    signer: AccountTransactionSigner,
+    intent_config: IntentConfig,
+) -> Optional[str]:
+    composer = AtomicTransactionComposer()
+    if not _queue_execution_config(client, composer, signer_addr, signer, intent_config):
+        return None
+
+    result = composer.execute(client, 4)
+    return result.tx_ids[0]
+
+
+def ensure_app_configs(
+    client: algod.AlgodClient,
+    signer_addr: str,
+    signer: AccountTransactionSigner,
+    intent_config: IntentConfig,
+) -> tuple[Optional[str], Optional[str]]:
+    """Configure storage and execution apps in a single atomic group.
+
+    Returns the ``(storage_txid, execution_txid)`` pair, with ``None`` for any app already up to date.
+    """
+    composer = AtomicTransactionComposer()
+    sp = client.suggested_params()
+    queued_storage = _queue_storage_config(client, composer, signer_addr, signer, intent_config, sp)
+    queued_execution = _queue_execution_config(client, composer, signer_addr, signer, intent_config, sp)
+    if not (queued_storage or queued_execution):
+        return None, None
+
+    tx_ids = iter(composer.execute(client, 4).tx_ids)
+    storage_txid = next(tx_ids) if queued_storage else None
+    execution_txid = next(tx_ids) if queued_execution else None
+    return storage_txid, execution_txid
+
+
+def _queue_storage_config(
+    client: algod.AlgodClient,
+    composer: AtomicTransactionComposer,
+    signer_addr: str,
+    signer: AccountTransactionSigner,
+    config: IntentConfig,
+    sp: Optional[sdk_txn.SuggestedParams] = None,
+) -> bool:
     params = _fetch_app_params(client, config.storage_app_id)
-    global_state = params.get("global-state", [])
-    current_keeper = _read_global_address(global_state, constants.G_KEEPER_LITERAL)
-    current_min_collateral = _read_global_uint(global_state, constants.G_MIN_COLLATERAL_LITERAL)
-    current_executor = _read_global_uint(global_state, constants.G_EXECUTOR_APP_LITERAL)
-    current_fee_split = _read_global_uint(global_state, constants.G_FEE_SPLIT_BPS_LITERAL)
+    state_index = _index_state(params.get("global-state", []))
+    current_keeper = _read_global_address(state_index, _KEY_B64["G_KEEPER_LITERAL"])
+    current_min_collateral = _read_global_uint(state_index, _KEY_B64["G_MIN_COLLATERAL_LITERAL"])
+    current_executor = _read_global_uint(state_index, _KEY_B64["G_EXECUTOR_APP_LITERAL"])
+    current_fee_split = _read_global_uint(state_index, _KEY_B64["G_FEE_SPLIT_BPS_LITERAL"])
 
     if (
         current_keeper == config.keeper_address
@@ -143,15 +248,13 @@ def ensure_storage_config(
         and current_executor == config.executor_app_id
         and current_fee_split == config.fee_split_bps
     ):
-        return None
+        return False
 
-    composer = AtomicTransactionComposer()
-    sp = client.suggested_params()
     composer.add_method_call(
         app_id=config.storage_app_id,
         method=_get_router_method("configure", contract="intent_storage"),
         sender=signer_addr,
-        sp=sp,
+        sp=sp or client.suggested_params(),
         signer=signer,
         method_args=[
             config.keeper_address,
@@ -160,37 +263,35 @@ def ensure_storage_config(
             config.executor_app_id,
         ],
     )
-
-    result = composer.execute(client, 4)
-    return result.tx_ids[0]
+    return True
 
 
-def ensure_execution_config(
+def _queue_execution_config(
     client: algod.AlgodClient,
+    composer: AtomicTransactionComposer,
     signer_addr: str,
     signer: AccountTransactionSigner,
     intent_config: IntentConfig,
-) -> Optional[str]:
+    sp: Optional[sdk_txn.SuggestedParams] = None,
+) -> bool:
     params = _fetch_app_params(client, intent_config.execution_app_id)
-    global_state = params.get("global-state", [])
-    current_keeper = _read_global_address(global_state, constants.G_KEEPER_LITERAL)
-    current_storage = _read_global_uint(global_state, constants.G_STORAGE_APP_LITERAL)
-    current_fee_split = _read_global_uint(global_state, constants.G_FEE_SPLIT_BPS_LITERAL)
+    state_index = _index_state(params.get("global-state", []))
+    current_keeper = _read_global_address(state_index, _KEY_B64["G_KEEPER_LITERAL"])
+    current_storage = _read_global_uint(state_index, _KEY_B64["G_STORAGE_APP_LITERAL"])
+    current_fee_split = _read_global_uint(state_index, _KEY_B64["G_FEE_SPLIT_BPS_LITERAL"])
 
     if (
         current_keeper == intent_config.keeper_address
         and current_storage == intent_config.storage_app_id
         and current_fee_split == intent_config.fee_split_bps
     ):
-        return None
+        return False
 
-    composer = AtomicTransactionComposer()
-    sp = client.suggested_params()
     composer.add_method_call(
         app_id=intent_config.execution_app_id,
         method=_get_router_method("configure", contract="execution"),
         sender=signer_addr,
-        sp=sp,
+        sp=sp or client.suggested_params(),
         signer=signer,
         method_args=[
             intent_config.storage_app_id,
@@ -198,12 +299,47 @@ def ensure_execution_config(
             intent_config.fee_split_bps,
         ],
     )
-
-    result = composer.execute(client, 4)
-    return result.tx_ids[0]
+    return True
+
+
+def build_workflow_blob(steps: Sequence[WorkflowStepSpec], *, use_abi_encoder: bool = False) -> bytes:
+    """Encode ``steps`` as ``(uint64,uint64,uint64,uint64,uint64,uint64,byte[])[]``.
+
+    ``use_abi_encoder`` forces the reference algosdk encoder, which is kept for validating the fast paths.
+    """
+    if use_abi_encoder:
+        return _build_workflow_blob_abi(steps)
+    return _build_workflow_blob_struct(steps)
+
+
+def _build_workflow_blob_struct(steps: Sequence[WorkflowStepSpec]) -> bytes:
+    heads = []
+    tails = []
+    offset = 2 * len(steps)
+    for spec in steps:
+        heads.append(_UINT16.pack(offset))
+        tails.append(
+            _WORKFLOW_STEP_PREFIX.pack(
+                spec.opcode,
+                spec.target_app_id,
+                spec.asset_in,
+                spec.asset_out,
+                spec.amount,
+                spec.slippage_bps,
+                50,
+                len(spec.extra),
+            )
+        )
+        tails.append(spec.extra)
+        offset += _WORKFLOW_STEP_PREFIX.size + len(spec.extra)
+    if offset > 0xFFFF:
+        raise ValueError("Workflow is too large for uint16 ABI offsets")
+    # bytes.join sizes the result up front and copies once; packing into a preallocated
+    # bytearray measured slower because of the per-field pack_into calls and final copy.
+    return b"".join([_UINT16.pack(len(steps)), *heads, *tails])
 
 
-def build_workflow_blob(steps: Sequence[WorkflowStepSpec]) -> bytes:
+def _build_workflow_blob_abi(steps: Sequence[WorkflowStepSpec]) -> bytes:
     tuple_steps = [
         (
             spec.opcode,
@@ -220,7 +356,13 @@ def build_workflow_blob(steps: Sequence[WorkflowStepSpec]) -> bytes:
 
 
 def compute_workflow_hash(workflow_blob: bytes) -> bytes:
-    return hashlib.sha256(workflow_blob).digest()
+    return _sha256_digest(workflow_blob)
+
+
+@functools.lru_cache(maxsize=256)
+def _encode_workflow(steps: tuple[WorkflowStepSpec, ...]) -> tuple[bytes, bytes]:
+    blob = build_workflow_blob(steps)
+    return blob, compute_workflow_hash(blob)
 
 
 def submit_intent(
@@ -243,7 +385,7 @@ def submit_intent(
         receiver=get_application_address(storage_app_id),
         amt=template.collateral_amount,
         sp=sp,
-        note=(note or DEFAULT_NOTE_PREFIX + b"-collateral"),
+        note=(note or NOTE_COLLATERAL),
     )
 
     storage_method = _get_router_method("register_intent", contract="intent_storage")
@@ -266,7 +408,7 @@ def submit_intent(
             template.app_asa_id,
         ],
         boxes=[(storage_app_id, intent_box_key)],
-        note=(note or DEFAULT_NOTE_PREFIX + b"-intent"),
+        note=(note or NOTE_INTENT),
     )
 
     result = composer.execute(client, 4)
@@ -274,7 +416,7 @@ def submit_intent(
 
 
 def basic_transfer_workflow(recipient: str, asset_id: int = 0, amount: int = 0) -> Sequence[WorkflowStepSpec]:
-    extra = encoding.decode_address(recipient)
+    extra = _decode_addr(recipient)
     return [
         WorkflowStepSpec(
             opcode=opcodes.OPCODE_TRANSFER,
@@ -298,7 +440,7 @@ def swap_workflow(
     swap_addr = pool_cfg.get("swap_escrow")
     if not isinstance(swap_addr, str):
         raise ValueError("Swap workflow requires 'swap_escrow' in tinyman pool config")
-    swap_bytes = encoding.decode_address(swap_addr)
+    swap_bytes = _decode_addr(swap_addr)
     asset_out = assets_cfg.get("USDC")
     if asset_out is None:
         raise ValueError("Missing USDC asset id in assets config for swap workflow")
@@ -323,8 +465,7 @@ def build_intent_template(
     app_escrow_id: int = 0,
     app_asa_id: int = 0,
 ) -> IntentTemplate:
-    blob = build_workflow_blob(steps)
-    workflow_hash = compute_workflow_hash(blob)
+    blob, workflow_hash = _encode_workflow(tuple(steps))
     return IntentTemplate(
         workflow_hash=workflow_hash,
         workflow_blob=blob,
@@ -368,13 +509,11 @@ def run_demo(args: argparse.Namespace) -> None:
         fee_split_bps=args.fee_split,
     )
 
-    txid = ensure_storage_config(client, sender_addr, signer, intent_config)
-    if txid:
-        print(f"Storage configure tx: {txid}")
-
-    txid = ensure_execution_config(client, sender_addr, signer, intent_config)
-    if txid:
-        print(f"Execution configure tx: {txid}")
+    storage_txid, execution_txid = ensure_app_configs(client, sender_addr, signer, intent_config)
+    if storage_txid:
+        print(f"Storage configure tx: {storage_txid}")
+    if execution_txid:
+        print(f"Execution configure tx: {execution_txid}")
 
     workflow_choice = args.workflow
     slippage_bps = args.slippage_bps
@@ -459,11 +598,11 @@ def run_execute(args: argparse.Namespace) -> None:
 
     composer = AtomicTransactionComposer()
     base_sp = client.suggested_params()
-    call_sp = copy.copy(base_sp)
+    call_sp = _clone_sp(base_sp)
     call_sp.flat_fee = True  # ensure we cover inner transaction costs explicitly
     call_sp.fee = max(call_sp.fee, 5_000)
     if workflow_choice == "swap":
-        funding_sp = copy.copy(base_sp)
+        funding_sp = _clone_sp(base_sp)
         funding_sp.flat_fee = True
         funding_sp.fee = max(funding_sp.fee, 1_000)
         funding_txn = sdk_txn.PaymentTxn(
@@ -471,7 +610,7 @@ def run_execute(args: argparse.Namespace) -> None:
             receiver=get_application_address(execution_app_id),
             amt=args.transfer_amount,
             sp=funding_sp,
-            note=DEFAULT_NOTE_PREFIX + b"-fund",
+            note=NOTE_FUND,
         )
         composer.add_transaction(TransactionWithSigner(funding_txn, signer))
     method = _get_router_method("execute_intent", contract="execution")
@@ -621,60 +760,71 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
 
 
 def _get_router_method(name: str, contract: str = "intent_storage"):
+    method = _router_methods(contract).get(name)
+    if method is None:
+        raise ValueError(f"Method {name} not found in {contract} router")
+    return method
+
+
+@functools.lru_cache(maxsize=None)
+def _router_methods(contract: str) -> dict[str, object]:
     from algo_flow_contracts.intent_storage.contract import build_router as storage_router
     from algo_flow_contracts.execution.contract import build_router as execution_router
 
     router = storage_router() if contract == "intent_storage" else execution_router()
-    for method in router.methods:
-        if method.name == name:
-            return method
-    raise ValueError(f"Method {name} not found in {contract} router")
-
-
-def _read_global_uint(state: Iterable[dict[str, object]], key_literal: bytes) -> int:
-    key_b64 = base64.b64encode(key_literal).decode()
-    for entry in state:
-        if entry.get("key") == key_b64:
-            value = entry.get("value", {})
-            if value.get("type") == 2:
-                return int(value.get("uint", 0))
+    return {method.name: method for method in router.methods}
+
+
+def _index_state(state: Iterable[dict[str, object]]) -> dict[str, dict]:
+    return {entry.get("key"): entry.get("value", {}) for entry in state}
+
+
+def _read_global_uint(state_index: dict[str, dict], key_b64: str) -> int:
+    value = state_index.get(key_b64, {})
+    if value.get("type") == 2:
+        return int(value.get("uint", 0))
     return 0
 
 
-def _read_global_address(state: Iterable[dict[str, object]], key_literal: bytes) -> str:
-    key_b64 = base64.b64encode(key_literal).decode()
-    for entry in state:
-        if entry.get("key") == key_b64:
-            value = entry.get("value", {})
-            if value.get("type") == 1:
-                raw = value.get("bytes", "")
-                if raw:
-                    return encoding.encode_address(base64.b64decode(raw))
+def _read_global_address(state_index: dict[str, dict], key_b64: str) -> str:
+    value = state_index.get(key_b64, {})
+    if value.get("type") == 1:
+        raw = value.get("bytes", "")
+        if raw:
+            return encoding.encode_address(base64.b64decode(raw))
     return ""
 
 
 def _get_next_intent_id(client: algod.AlgodClient, storage_app_id: int) -> int:
     params = _fetch_app_params(client, storage_app_id)
-    global_state = params.get("global-state", [])
-    next_id = _read_global_uint(global_state, constants.G_NEXT_INTENT_LITERAL)
+    state_index = _index_state(params.get("global-state", []))
+    next_id = _read_global_uint(state_index, _KEY_B64["G_NEXT_INTENT_LITERAL"])
     if next_id == 0:
         return 1
     return next_id
 
 
+@functools.lru_cache(maxsize=1024)
+def _decode_addr(addr: str) -> bytes:
+    return encoding.decode_address(addr)
+
+
+def _clone_sp(sp: sdk_txn.SuggestedParams) -> sdk_txn.SuggestedParams:
+    clone = type(sp).__new__(type(sp))
+    clone.__dict__.update(sp.__dict__)
+    return clone
+
+
 def _intent_box_key_bytes(intent_id: int) -> bytes:
-    prefix = constants.BOX_PREFIX_INTENT_LITERAL
-    return prefix + intent_id.to_bytes(8, "big", signed=False)
+    return constants.BOX_PREFIX_INTENT_LITERAL + _BOX_KEY_STRUCT.pack(intent_id)
+
+
+_COMMANDS = {"demo": run_demo, "execute": run_execute}
 
 
 def main(argv: Optional[Sequence[str]] = None) -> None:
     args = parse_args(argv)
-    if args.command == "demo":
-        run_demo(args)
-    elif args.command == "execute":
-        run_execute(args)
-    else:  # pragma: no cover - safeguarded by argparse choices
-        raise ValueError(f"Unknown command {args.command}")
+    _COMMANDS[args.command](args)
 
 
 if __name__ == "__main__":
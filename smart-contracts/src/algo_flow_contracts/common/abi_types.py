@@ -6,9 +6,13 @@ from pyteal import abi
 
 StaticBytes32 = abi.StaticBytes[Literal[32]]
 
+# TypeSpecs are immutable descriptions, so one instance can back every
+# StaticBytes value; only the value itself (and its scratch slot) is per-use.
+STATIC_BYTES32_TYPE_SPEC = abi.StaticBytesTypeSpec(32)
+
 
 def new_static_bytes32() -> abi.StaticBytes:
-    return abi.StaticBytes(abi.StaticBytesTypeSpec(32))
+    return abi.StaticBytes(STATIC_BYTES32_TYPE_SPEC)
 
 
 class IntentRecord(abi.NamedTuple):
@@ -24,6 +28,14 @@ class IntentRecord(abi.NamedTuple):
     app_asa_id: abi.Field[abi.Uint64]
 
 
+# Byte offsets of fixed-width IntentRecord head fields that are read or
+# rewritten in place: owner(32) precedes collateral, then workflow_hash(32)
+# precedes status.
+INTENT_RECORD_OWNER_OFFSET = 0
+INTENT_RECORD_COLLATERAL_OFFSET = 32
+INTENT_RECORD_STATUS_OFFSET = 72
+
+
 class AuditLogEntry(abi.NamedTuple):
     timestamp: abi.Field[abi.Uint64]
     intent_id: abi.Field[abi.Uint64]
@@ -42,6 +54,14 @@ class WorkflowStep(abi.NamedTuple):
     extra: abi.Field[abi.DynamicBytes]
 
 
+# Byte offsets inside an encoded WorkflowStep: six uint64 fields, the uint16
+# head offset of ``extra``, then the uint16 length prefix and ``extra`` bytes.
+# In a canonical encoding the head offset word holds 50, the length's offset.
+WORKFLOW_STEP_EXTRA_HEAD_OFFSET = 48
+WORKFLOW_STEP_EXTRA_LENGTH_OFFSET = 50
+WORKFLOW_STEP_EXTRA_OFFSET = 52
+
+
 class TriggerConfig(abi.NamedTuple):
     trigger_type: abi.Field[abi.Uint64]
     oracle_app_id: abi.Field[abi.Uint64]
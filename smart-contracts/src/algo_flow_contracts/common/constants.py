@@ -1,6 +1,8 @@
 """Domain constants for AlgoFlow contracts."""
 
-# Workflow status codes
+# Workflow status codes. Values already fit single-byte varints and intc slots
+# are assigned by use frequency, so renumbering buys nothing; they are also
+# persisted in intent boxes and must stay stable across deployments.
 INTENT_STATUS_ACTIVE = 1
 INTENT_STATUS_EXECUTING = 2
 INTENT_STATUS_SUCCESS = 3
@@ -37,6 +39,10 @@ LOG_TOPIC_INTENT_CREATED_LITERAL = b"EVENT_INTENT_CREATED"
 LOG_TOPIC_INTENT_STATUS_LITERAL = b"EVENT_INTENT_STATUS"
 LOG_TOPIC_EXECUTION_RESULT_LITERAL = b"EVENT_EXECUTION"
 
+# Pool application method tags sent as the first app arg of step inner calls
+POOL_METHOD_SWAP_LITERAL = b"swap"
+POOL_METHOD_ADD_LIQUIDITY_LITERAL = b"add_liquidity"
+
 # Fee bounds
 MAX_KEEPER_FEE_BPS = 2000  # 20%
 KEEPER_FEE_SCALE = 10_000
@@ -67,3 +67,11 @@ def log_topic_intent_status() -> Bytes:
 
 def log_topic_execution_result() -> Bytes:
     return Bytes(constants.LOG_TOPIC_EXECUTION_RESULT_LITERAL)
+
+
+def pool_method_swap() -> Bytes:
+    return Bytes(constants.POOL_METHOD_SWAP_LITERAL)
+
+
+def pool_method_add_liquidity() -> Bytes:
+    return Bytes(constants.POOL_METHOD_ADD_LIQUIDITY_LITERAL)
@@ -6,7 +6,11 @@ from .expressions import box_key_separator, box_prefix_intent, box_prefix_audit
 
 
 def intent_box_key(intent_id: Expr) -> Expr:
-    return Concat(box_prefix_intent(), Itob(intent_id))
+    return intent_box_key_from_bytes(Itob(intent_id))
+
+
+def intent_box_key_from_bytes(intent_id_bytes: Expr) -> Expr:
+    return Concat(box_prefix_intent(), intent_id_bytes)
 
 
 def audit_box_key(intent_id: Expr, index: Expr) -> Expr:
@@ -1,5 +1,8 @@
 """Workflow step opcode definitions."""
 
+# The execution router currently dispatches SWAP, PROVIDE_LIQUIDITY and
+# TRANSFER; the remaining codes are reserved for off-chain planning and are
+# rejected on-chain until a handler lands for them.
 OPCODE_SWAP = 1
 OPCODE_PROVIDE_LIQUIDITY = 2
 OPCODE_STAKE = 3
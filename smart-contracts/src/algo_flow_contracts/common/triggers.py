@@ -3,5 +3,6 @@
 TRIGGER_TYPE_NONE = 0
 TRIGGER_TYPE_PRICE_THRESHOLD = 1
 
+# Comparators stay 0 and 1 so contracts can validate them with one bound check.
 COMPARATOR_GTE = 0
 COMPARATOR_LTE = 1
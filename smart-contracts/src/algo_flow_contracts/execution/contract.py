@@ -1,16 +1,21 @@
 """Execution router contract for AlgoFlow intents."""
 
+from functools import lru_cache
+from typing import Callable, Optional
+
 from pyteal import (
-    AccountParam,
     And,
     App,
     Approve,
     Assert,
     AssetHolding,
+    Balance,
     BareCallActions,
-    Bytes,
     Cond,
     Expr,
+    Extract,
+    ExtractUint16,
+    ExtractUint64,
     For,
     Global,
     If,
@@ -20,7 +25,7 @@ from pyteal import (
     Not,
     OnComplete,
     OnCompleteAction,
-    Or,
+    OptimizeOptions,
     Reject,
     Return,
     Router,
@@ -38,23 +43,34 @@ from pyteal import (
     InnerTxn,
 )
 
-from ..common import abi_types, abi_utils, constants, events, opcodes, triggers
-from ..common.abi_types import WorkflowStep
+from ..common import abi_types, constants, events, opcodes, triggers
+from ..common.abi_types import (
+    WORKFLOW_STEP_EXTRA_HEAD_OFFSET,
+    WORKFLOW_STEP_EXTRA_LENGTH_OFFSET,
+    WORKFLOW_STEP_EXTRA_OFFSET,
+)
 from ..common.expressions import (
     g_fee_split_bps_key,
     g_keeper_key,
     g_owner_key,
     g_storage_app_key,
     g_version_key,
+    pool_method_add_liquidity,
+    pool_method_swap,
 )
 
 
 TEAL_VERSION = 8
 from ..common.validation import ensure_fee_bounds, ensure_owner
 
-ABI_RETURN_PREFIX = Bytes("base16", "151f7c75")
+# Leaving frame_pointers unset lets PyTeal use them from v8 on, where they
+# shave the router's subroutine bookkeeping, while older targets still
+# compile. Constant assembly (pushint/pushbytes plus frequency-sorted cblocks)
+# is enabled by the compile scripts via ``assembleConstants``.
+OPTIMIZE_OPTIONS = OptimizeOptions(scratch_slots=True)
 
 
+@lru_cache(maxsize=None)
 def build_router() -> Router:
     owner_key = g_owner_key()
     keeper_key = g_keeper_key()
@@ -92,16 +108,12 @@ def build_router() -> Router:
         default_keeper: abi.Address,
         keeper_fee_bps: abi.Uint64,
     ) -> Expr:
-        storage_value = ScratchVar(TealType.uint64)
-        fee_value = ScratchVar(TealType.uint64)
         return Seq(
-            storage_value.store(storage_app_id.get()),
-            fee_value.store(keeper_fee_bps.get()),
             ensure_owner(Txn.sender(), App.globalGet(owner_key)),
-            ensure_fee_bounds(fee_value.load()),
-            App.globalPut(storage_key, storage_value.load()),
+            ensure_fee_bounds(keeper_fee_bps.get()),
+            App.globalPut(storage_key, storage_app_id.get()),
             App.globalPut(keeper_key, default_keeper.get()),
-            App.globalPut(fee_key, fee_value.load()),
+            App.globalPut(fee_key, keeper_fee_bps.get()),
             Approve(),
         )
 
@@ -112,17 +124,11 @@ def build_router() -> Router:
         execution_plan: abi.DynamicBytes,
         fee_recipient: abi.Address,
     ) -> Expr:
-        storage_value = ScratchVar(TealType.uint64)
-        intent_bytes = ScratchVar(TealType.bytes)
         intent_record = abi_types.IntentRecord()
         owner_field = abi.Address()
-        keeper_field = abi.Address()
         status_field = abi.Uint64()
         workflow_hash = abi_types.new_static_bytes32()
-        workflow_blob = abi.DynamicBytes()
-        version_field = abi.Uint64()
         trigger_field = abi.DynamicBytes()
-        app_escrow_field = abi.Uint64()
         app_asa_field = abi.Uint64()
         trigger_config = abi_types.TriggerConfig()
         trigger_type_field = abi.Uint64()
@@ -130,58 +136,26 @@ def build_router() -> Router:
         trigger_oracle_key_field = abi.DynamicBytes()
         trigger_comparator_field = abi.Uint64()
         trigger_threshold_field = abi.Uint64()
-        plan_array = abi.DynamicArray(
-            abi.DynamicArrayTypeSpec(WorkflowStep().type_spec())
-        )
-        plan_length = ScratchVar(TealType.uint64)
-        index = ScratchVar(TealType.uint64)
-        step_tuple = WorkflowStep()
-        opcode_field = abi.Uint64()
-        target_field = abi.Uint64()
-        asset_in_field = abi.Uint64()
-        asset_out_field = abi.Uint64()
-        amount_field = abi.Uint64()
-        slippage_field = abi.Uint64()
-        extra_field = abi.DynamicBytes()
-        opcode_int = ScratchVar(TealType.uint64)
-        target_int = ScratchVar(TealType.uint64)
-        asset_in_int = ScratchVar(TealType.uint64)
-        asset_out_int = ScratchVar(TealType.uint64)
-        amount_int = ScratchVar(TealType.uint64)
-        slippage_int = ScratchVar(TealType.uint64)
-        status_int = ScratchVar(TealType.uint64)
-        hash_check = ScratchVar(TealType.bytes)
-        collateral_field = abi.Uint64()
+        plan = ScratchVar(TealType.bytes)
 
         return Seq(
-            storage_value.store(App.globalGet(storage_key)),
-            Assert(storage_value.load() != Int(0)),
-            intent_bytes.store(intent_blob.get()),
-            intent_record.decode(intent_bytes.load()),
+            Assert(App.globalGet(storage_key) != Int(0)),
+            intent_record.decode(intent_blob.get()),
             intent_record.owner.store_into(owner_field),
-            intent_record.keeper.store_into(keeper_field),
             intent_record.status.store_into(status_field),
             intent_record.workflow_hash.store_into(workflow_hash),
-            intent_record.workflow_blob.store_into(workflow_blob),
-            intent_record.version.store_into(version_field),
             intent_record.trigger_condition.store_into(trigger_field),
-            intent_record.app_escrow_id.store_into(app_escrow_field),
             intent_record.app_asa_id.store_into(app_asa_field),
-            intent_record.collateral.store_into(collateral_field),
-            status_int.store(status_field.get()),
-            Assert(status_int.load() == Int(constants.INTENT_STATUS_ACTIVE)),
-            opt_in_asset(app_asa_field.get()),
-            If(Len(trigger_field.get()) == Int(0))
-            .Then(
-                Seq(
-                    trigger_type_field.set(Int(triggers.TRIGGER_TYPE_NONE)),
-                    trigger_oracle_app_field.set(Int(0)),
-                    trigger_oracle_key_field.set(Bytes("")),
-                    trigger_comparator_field.set(Int(triggers.COMPARATOR_GTE)),
-                    trigger_threshold_field.set(Int(0)),
-                )
-            )
-            .Else(
+            Assert(status_field.get() == Int(constants.INTENT_STATUS_ACTIVE)),
+            # Reject tampered plans before any inner transaction or oracle read.
+            # sha256 (flat cost 35) is cheaper than sha512_256 (45) and matches
+            # the hash clients store with each intent.
+            plan.store(execution_plan.get()),
+            Assert(Sha256(plan.load()) == workflow_hash.get()),
+            # Most intents carry no app ASA; skip the opt-in call entirely then.
+            If(app_asa_field.get() != Int(0)).Then(opt_in_asset(app_asa_field.get())),
+            # Untriggered intents skip the decode and the validate_trigger call.
+            If(Len(trigger_field.get()) > Int(0)).Then(
                 Seq(
                     trigger_config.decode(trigger_field.get()),
                     trigger_config.trigger_type.store_into(trigger_type_field),
@@ -189,52 +163,21 @@ def build_router() -> Router:
                     trigger_config.oracle_price_key.store_into(trigger_oracle_key_field),
                     trigger_config.comparator.store_into(trigger_comparator_field),
                     trigger_config.threshold.store_into(trigger_threshold_field),
-                )
-            ),
-            validate_trigger(
-                trigger_type_field.get(),
-                trigger_oracle_app_field.get(),
-                trigger_oracle_key_field.get(),
-                trigger_comparator_field.get(),
-                trigger_threshold_field.get(),
-            ),
-            hash_check.store(Sha256(execution_plan.get())),
-            Assert(hash_check.load() == workflow_hash.get()),
-            plan_array.decode(execution_plan.get()),
-            plan_length.store(plan_array.length()),
-            Assert(plan_length.load() > Int(0)),
-            # Balance tracking: asset_id -> available_amount
-            # For first step, use plan amount; subsequent steps use actual output
-            For(index.store(Int(0)), index.load() < plan_length.load(), index.store(index.load() + Int(1))).Do(
-                Seq(
-                    plan_array[index.load()].store_into(step_tuple),
-                    step_tuple.opcode.store_into(opcode_field),
-                    step_tuple.target_app_id.store_into(target_field),
-                    step_tuple.asset_in.store_into(asset_in_field),
-                    step_tuple.asset_out.store_into(asset_out_field),
-                    step_tuple.amount.store_into(amount_field),
-                    step_tuple.slippage_bps.store_into(slippage_field),
-                    step_tuple.extra.store_into(extra_field),
-                    opcode_int.store(abi_utils.uint64_to_int(opcode_field)),
-                    target_int.store(abi_utils.uint64_to_int(target_field)),
-                    asset_in_int.store(abi_utils.uint64_to_int(asset_in_field)),
-                    asset_out_int.store(abi_utils.uint64_to_int(asset_out_field)),
-                    # Use plan amount for first step, or if amount is non-zero (explicit amount)
-                    # Otherwise steps inherit actual output from previous step via balance delta
-                    amount_int.store(abi_utils.uint64_to_int(amount_field)),
-                    slippage_int.store(abi_utils.uint64_to_int(slippage_field)),
-                    dispatch_workflow_step(
-                        opcode_int.load(),
-                        target_int.load(),
-                        asset_in_int.load(),
-                        asset_out_int.load(),
-                        amount_int.load(),
-                        slippage_int.load(),
-                        extra_field.get(),
-                        owner_field.get(),
+                    validate_trigger(
+                        trigger_type_field.get(),
+                        trigger_oracle_app_field.get(),
+                        trigger_oracle_key_field.get(),
+                        trigger_comparator_field.get(),
+                        trigger_threshold_field.get(),
                     ),
                 )
             ),
+            # A zero amount makes a step spend the app's current balance,
+            # i.e. the output of the previous step.
+            walk_execution_plan(
+                plan,
+                lambda *step_fields: dispatch_workflow_step(*step_fields, owner_field.get()),
+            ),
             events.log_intent_status(
                 intent_id.encode(),
                 Itob(Int(constants.INTENT_STATUS_SUCCESS)),
@@ -246,12 +189,55 @@ def build_router() -> Router:
     return router
 
 
-@Subroutine(TealType.bytes)
-def extract_abi_return(log_value: Expr) -> Expr:
+def walk_execution_plan(plan: ScratchVar, visit_step: Callable[..., Expr]) -> Expr:
+    """Call ``visit_step`` with the seven fields of each step in an encoded
+    ``(uint64,uint64,uint64,uint64,uint64,uint64,byte[])[]`` plan."""
+    plan_length = ScratchVar(TealType.uint64)
+    index = ScratchVar(TealType.uint64)
+    cursor = ScratchVar(TealType.uint64)
+    extra_length = ScratchVar(TealType.uint64)
     return Seq(
-        Assert(Len(log_value) >= Int(4)),
-        Assert(Substring(log_value, Int(0), Int(4)) == ABI_RETURN_PREFIX),
-        Substring(log_value, Int(4), Len(log_value)),
+        plan_length.store(ExtractUint16(plan.load(), Int(0))),
+        Assert(plan_length.load() > Int(0)),
+        # Steps follow the uint16 head table back to back, so a cursor
+        # replaces the per-index head lookups and tuple copies of
+        # DynamicArray access. The loop is deliberately not unrolled: its
+        # overhead is one compare and branch per step, while each copy of
+        # the body adds ~30 ops.
+        cursor.store(Int(2) + plan_length.load() * Int(2)),
+        For(index.store(Int(0)), index.load() < plan_length.load(), index.store(index.load() + Int(1))).Do(
+            Seq(
+                # Only canonically packed plans are walked by cursor: each head
+                # entry must point at the cursor and each step's ``extra`` must
+                # follow its fixed fields, or an ABI decoder would see
+                # different steps than the ones executed.
+                Assert(ExtractUint16(plan.load(), Int(2) + index.load() * Int(2)) + Int(2) == cursor.load()),
+                Assert(
+                    ExtractUint16(plan.load(), cursor.load() + Int(WORKFLOW_STEP_EXTRA_HEAD_OFFSET))
+                    == Int(WORKFLOW_STEP_EXTRA_LENGTH_OFFSET)
+                ),
+                extra_length.store(
+                    ExtractUint16(plan.load(), cursor.load() + Int(WORKFLOW_STEP_EXTRA_LENGTH_OFFSET))
+                ),
+                visit_step(
+                    ExtractUint64(plan.load(), cursor.load()),
+                    ExtractUint64(plan.load(), cursor.load() + Int(8)),
+                    ExtractUint64(plan.load(), cursor.load() + Int(16)),
+                    ExtractUint64(plan.load(), cursor.load() + Int(24)),
+                    ExtractUint64(plan.load(), cursor.load() + Int(32)),
+                    ExtractUint64(plan.load(), cursor.load() + Int(40)),
+                    Extract(
+                        plan.load(),
+                        cursor.load() + Int(WORKFLOW_STEP_EXTRA_OFFSET),
+                        extra_length.load(),
+                    ),
+                ),
+                cursor.store(cursor.load() + Int(WORKFLOW_STEP_EXTRA_OFFSET) + extra_length.load()),
+            )
+        ),
+        # The declared step count must cover the whole blob: trailing step
+        # bodies would run here yet be invisible to an ABI decoder.
+        Assert(cursor.load() == Len(plan.load())),
     )
 
 
@@ -266,6 +252,9 @@ def dispatch_workflow_step(
     extra_args: Expr,
     owner: Expr,
 ) -> Expr:
+    # PyTeal exposes no match/switch expression, so dispatch stays a Cond.
+    # Arms test swap, then provide-liquidity, then transfer; with three
+    # handlers a bisecting If tree would not save any comparisons.
     return Cond(
         [opcode == Int(opcodes.OPCODE_SWAP),
          swap_step(target_app_id, asset_in, asset_out, amount, slippage_bps, extra_args, owner)],
@@ -277,43 +266,84 @@ def dispatch_workflow_step(
     )
 
 
-@Subroutine(TealType.uint64)
+# Largest amount whose product with a bounded slippage_bps fits in a uint64.
+SLIPPAGE_NARROW_LIMIT = (2**64 - 1) // constants.KEEPER_FEE_SCALE
+
+
 def amount_after_slippage(amount: Expr, slippage_bps: Expr) -> Expr:
-    return amount - WideRatio(
-        [amount, slippage_bps],
-        [Int(constants.KEEPER_FEE_SCALE)],
+    # Literal operands are folded here, since PyTeal emits the math as written.
+    if (
+        isinstance(amount, Int)
+        and isinstance(slippage_bps, Int)
+        and slippage_bps.value <= constants.KEEPER_FEE_SCALE
+    ):
+        return Int(
+            amount.value - amount.value * slippage_bps.value // constants.KEEPER_FEE_SCALE
+        )
+    # Callers assert slippage_bps <= KEEPER_FEE_SCALE, so everyday amounts take
+    # a plain mul/div; only amounts near the uint64 limit need WideRatio.
+    return amount - If(
+        amount <= Int(SLIPPAGE_NARROW_LIMIT),
+        amount * slippage_bps / Int(constants.KEEPER_FEE_SCALE),
+        WideRatio(
+            [amount, slippage_bps],
+            [Int(constants.KEEPER_FEE_SCALE)],
+        ),
     )
 
 
+def payment_fields(amount: Expr, destination: Expr) -> Expr:
+    return InnerTxnBuilder.SetFields(
+        {
+            TxnField.type_enum: Int(1),
+            TxnField.receiver: destination,
+            TxnField.amount: amount,
+            TxnField.fee: Int(0),
+        }
+    )
+
+
+def asset_transfer_fields(asset_id: Expr, amount: Expr, destination: Expr) -> Expr:
+    return InnerTxnBuilder.SetFields(
+        {
+            TxnField.type_enum: Int(4),
+            TxnField.xfer_asset: asset_id,
+            TxnField.asset_amount: amount,
+            TxnField.asset_receiver: destination,
+            TxnField.fee: Int(0),
+        }
+    )
+
+
+def transfer_fields(asset_id: Expr, amount: Expr, destination: Expr) -> Expr:
+    return If(asset_id == Int(0)).Then(payment_fields(amount, destination)).Else(
+        asset_transfer_fields(asset_id, amount, destination)
+    )
+
+
+# ``destination`` always comes from extract_pool_address, which already pins
+# it to 32 bytes; the itxn receiver field rejects anything else regardless.
 @Subroutine(TealType.none)
 def transfer_to_pool(asset_id: Expr, amount: Expr, destination: Expr) -> Expr:
     return Seq(
-        Assert(Len(destination) == Int(32)),
         Assert(amount > Int(0)),
-        InnerTxnBuilder.Begin(),
+        # Each branch builds and submits its own transaction, so both paths
+        # run straight through without rejoining between Begin and Submit.
         If(asset_id == Int(0))
         .Then(
-            InnerTxnBuilder.SetFields(
-                {
-                    TxnField.type_enum: Int(1),
-                    TxnField.receiver: destination,
-                    TxnField.amount: amount,
-                    TxnField.fee: Int(0),
-                }
+            Seq(
+                InnerTxnBuilder.Begin(),
+                payment_fields(amount, destination),
+                InnerTxnBuilder.Submit(),
             )
         )
         .Else(
-            InnerTxnBuilder.SetFields(
-                {
-                    TxnField.type_enum: Int(4),
-                    TxnField.xfer_asset: asset_id,
-                    TxnField.asset_amount: amount,
-                    TxnField.asset_receiver: destination,
-                    TxnField.fee: Int(0),
-                }
+            Seq(
+                InnerTxnBuilder.Begin(),
+                asset_transfer_fields(asset_id, amount, destination),
+                InnerTxnBuilder.Submit(),
             )
         ),
-        InnerTxnBuilder.Submit(),
     )
 
 
@@ -322,9 +352,14 @@ def inner_app_call(
     args,
     assets,
     accounts,
+    funding: Optional[Expr] = None,
 ) -> Expr:
+    """Submit an application call, optionally preceded by ``funding`` fields
+    in the same inner group so both legs settle with one ``itxn_submit``."""
+    prelude = [funding, InnerTxnBuilder.Next()] if funding is not None else []
     return Seq(
         InnerTxnBuilder.Begin(),
+        *prelude,
         InnerTxnBuilder.SetFields(
             {
                 TxnField.type_enum: Int(6),
@@ -340,22 +375,13 @@ def inner_app_call(
     )
 
 
-def capture_balance(asset_id: Expr, slot: ScratchVar) -> Expr:
-    return slot.store(get_balance(asset_id))
-
-
-@Subroutine(TealType.uint64)
-def compute_delta(pre_value: Expr, post_value: Expr) -> Expr:
-    return post_value - pre_value
-
-
-@Subroutine(TealType.uint64)
 def resolve_amount(asset_id: Expr, requested_amount: Expr) -> Expr:
     return If(requested_amount == Int(0)).Then(get_balance(asset_id)).Else(requested_amount)
 
 
 @Subroutine(TealType.none)
-def swap_step(
+def pool_step(
+    method: Expr,
     pool_app: Expr,
     asset_in: Expr,
     asset_out: Expr,
@@ -365,13 +391,9 @@ def swap_step(
     owner: Expr,
 ) -> Expr:
     """
-    Swap asset_in for asset_out.
-    If amount == 0, use entire balance of asset_in.
+    Fund the pool with asset_in and call ``method`` on the pool app.
+    Swap and add-liquidity share this body and differ only in the method tag.
     """
-    pre_out = ScratchVar(TealType.uint64)
-    post_out = ScratchVar(TealType.uint64)
-    delta_out = ScratchVar(TealType.uint64)
-    min_return = ScratchVar(TealType.uint64)
     pool_addr = ScratchVar(TealType.bytes)
     actual_amount = ScratchVar(TealType.uint64)
     return Seq(
@@ -379,29 +401,41 @@ def swap_step(
         actual_amount.store(resolve_amount(asset_in, amount)),
         Assert(actual_amount.load() > Int(0)),
         Assert(slippage_bps <= Int(constants.KEEPER_FEE_SCALE)),
-        opt_in_asset(asset_in),
         opt_in_asset(asset_out),
-        capture_balance(asset_out, pre_out),
-        transfer_to_pool(asset_in, actual_amount.load(), pool_addr.load()),
-        min_return.store(amount_after_slippage(actual_amount.load(), slippage_bps)),
         inner_app_call(
             pool_app,
             [
-                Bytes("swap"),
+                method,
                 Itob(asset_in),
                 Itob(asset_out),
                 Itob(actual_amount.load()),
-                Itob(min_return.load()),
+                Itob(amount_after_slippage(actual_amount.load(), slippage_bps)),
             ],
             [asset_in, asset_out],
             [pool_addr.load(), owner],
+            funding=transfer_fields(asset_in, actual_amount.load(), pool_addr.load()),
         ),
-        capture_balance(asset_out, post_out),
-        delta_out.store(compute_delta(pre_out.load(), post_out.load())),
     )
 
 
-@Subroutine(TealType.none)
+def swap_step(
+    pool_app: Expr,
+    asset_in: Expr,
+    asset_out: Expr,
+    amount: Expr,
+    slippage_bps: Expr,
+    extra_args: Expr,
+    owner: Expr,
+) -> Expr:
+    """
+    Swap asset_in for asset_out.
+    If amount == 0, use entire balance of asset_in.
+    """
+    return pool_step(
+        pool_method_swap(), pool_app, asset_in, asset_out, amount, slippage_bps, extra_args, owner
+    )
+
+
 def provide_liquidity_step(
     pool_app: Expr,
     asset_a: Expr,
@@ -415,36 +449,8 @@ def provide_liquidity_step(
     Provide liquidity with asset_a and asset_b.
     If amount_a == 0, use entire balance of asset_a.
     """
-    pre_b = ScratchVar(TealType.uint64)
-    post_b = ScratchVar(TealType.uint64)
-    delta_b = ScratchVar(TealType.uint64)
-    paired_amount = ScratchVar(TealType.uint64)
-    pool_addr = ScratchVar(TealType.bytes)
-    actual_amount = ScratchVar(TealType.uint64)
-    return Seq(
-        pool_addr.store(extract_pool_address(extra_args)),
-        actual_amount.store(resolve_amount(asset_a, amount_a)),
-        Assert(actual_amount.load() > Int(0)),
-        Assert(slippage_bps <= Int(constants.KEEPER_FEE_SCALE)),
-        opt_in_asset(asset_a),
-        opt_in_asset(asset_b),
-        capture_balance(asset_b, pre_b),
-        transfer_to_pool(asset_a, actual_amount.load(), pool_addr.load()),
-        paired_amount.store(amount_after_slippage(actual_amount.load(), slippage_bps)),
-        inner_app_call(
-            pool_app,
-            [
-                Bytes("add_liquidity"),
-                Itob(asset_a),
-                Itob(asset_b),
-                Itob(actual_amount.load()),
-                Itob(paired_amount.load()),
-            ],
-            [asset_a, asset_b],
-            [pool_addr.load(), owner],
-        ),
-        capture_balance(asset_b, post_b),
-        delta_b.store(compute_delta(pre_b.load(), post_b.load())),
+    return pool_step(
+        pool_method_add_liquidity(), pool_app, asset_a, asset_b, amount_a, slippage_bps, extra_args, owner
     )
 
 
@@ -454,23 +460,17 @@ def transfer_step(asset_id: Expr, amount: Expr, extra_args: Expr) -> Expr:
     Transfer asset to recipient.
     If amount == 0, transfer entire balance of asset_id.
     """
-    pre_value = ScratchVar(TealType.uint64)
-    post_value = ScratchVar(TealType.uint64)
-    delta_value = ScratchVar(TealType.uint64)
-    recipient = ScratchVar(TealType.bytes)
     actual_amount = ScratchVar(TealType.uint64)
     return Seq(
-        recipient.store(extract_pool_address(extra_args)),
         actual_amount.store(resolve_amount(asset_id, amount)),
         Assert(actual_amount.load() > Int(0)),
-        opt_in_asset(asset_id),
-        capture_balance(asset_id, pre_value),
-        transfer_to_pool(asset_id, actual_amount.load(), recipient.load()),
-        capture_balance(asset_id, post_value),
-        delta_value.store(compute_delta(pre_value.load(), post_value.load())),
+        transfer_to_pool(asset_id, actual_amount.load(), extract_pool_address(extra_args)),
     )
 
 
+# Steps only opt in to the asset they receive: the asset they spend must
+# already be held for the outgoing transfer to succeed, so probing it again
+# would just repeat an asset_holding_get per step.
 @Subroutine(TealType.none)
 def opt_in_asset(asset_id: Expr) -> Expr:
     holding = AssetHolding.balance(Global.current_application_address(), asset_id)
@@ -499,31 +499,19 @@ def opt_in_asset(asset_id: Expr) -> Expr:
 @Subroutine(TealType.uint64)
 def get_balance(asset_id: Expr) -> Expr:
     contract_address = Global.current_application_address()
-    balance_slot = ScratchVar(TealType.uint64)
-    algo_balance = AccountParam.balance(contract_address)
     asset_balance = AssetHolding.balance(contract_address, asset_id)
-    return Seq(
-        If(asset_id == Int(0))
-        .Then(
-            Seq(
-                algo_balance,
-                Assert(algo_balance.hasValue()),
-                balance_slot.store(algo_balance.value()),
-            )
-        )
-        .Else(
-            Seq(
-                asset_balance,
-                If(asset_balance.hasValue())
-                .Then(balance_slot.store(asset_balance.value()))
-                .Else(balance_slot.store(Int(0))),
-            )
+    # asset_holding_get pushes a zero amount when the app is not opted in, so
+    # the asset branch can return the value directly without a flag check.
+    return If(
+        asset_id == Int(0),
+        Balance(contract_address),
+        Seq(
+            asset_balance,
+            asset_balance.value(),
         ),
-        balance_slot.load(),
     )
 
 
-@Subroutine(TealType.bytes)
 def extract_pool_address(extra: Expr) -> Expr:
     return Seq(
         Assert(Len(extra) >= Int(32)),
@@ -539,7 +527,6 @@ def validate_trigger(
     comparator: Expr,
     threshold: Expr,
 ) -> Expr:
-    price_value = ScratchVar(TealType.uint64)
     oracle_param = App.globalGetEx(oracle_app_id, oracle_key)
     return Seq(
         If(trigger_type != Int(triggers.TRIGGER_TYPE_NONE)).Then(
@@ -547,33 +534,30 @@ def validate_trigger(
                 Assert(oracle_app_id != Int(0)),
                 oracle_param,
                 Assert(oracle_param.hasValue()),
-                price_value.store(oracle_param.value()),
-                Assert(
-                    Or(
-                        comparator == Int(triggers.COMPARATOR_GTE),
-                        comparator == Int(triggers.COMPARATOR_LTE),
-                    )
-                ),
+                Assert(comparator <= Int(triggers.COMPARATOR_LTE)),
                 If(comparator == Int(triggers.COMPARATOR_GTE))
-                .Then(Assert(price_value.load() >= threshold))
-                .Else(Assert(price_value.load() <= threshold)),
+                .Then(Assert(oracle_param.value() >= threshold))
+                .Else(Assert(oracle_param.value() <= threshold)),
             )
         )
     )
 
 
-def approval_program(version: int = TEAL_VERSION) -> Expr:
+@lru_cache(maxsize=None)
+def _compile(version: int) -> tuple[Expr, Expr]:
+    """Build the approval and clear-state expressions once per TEAL version."""
     router = build_router()
     if hasattr(router, "approval_ast"):
         approval_expr = router.approval_ast.program_construction()
+        clear_expr = router.clear_state
     else:
         compiled = router.compile_program(version=version)
         if isinstance(compiled, tuple):
-            approval_expr = compiled[0]
+            approval_expr, clear_expr = compiled[0], compiled[1]
         elif hasattr(compiled, "approval_program"):
-            approval_expr = compiled.approval_program
+            approval_expr, clear_expr = compiled.approval_program, compiled.clear_state_program
         else:
-            approval_expr = compiled
+            approval_expr = clear_expr = compiled
 
     create_action = router.bare_call_actions.no_op.action
     delete_action = router.bare_call_actions.delete_application.action
@@ -586,7 +570,7 @@ def approval_program(version: int = TEAL_VERSION) -> Expr:
         [Int(1), Reject()],
     )
 
-    return Seq(
+    approval = Seq(
         If(Txn.application_args.length() == Int(0)).Then(
             Seq(
                 bare_dispatch,
@@ -595,15 +579,12 @@ def approval_program(version: int = TEAL_VERSION) -> Expr:
         ),
         approval_expr,
     )
+    return approval, clear_expr
+
+
+def approval_program(version: int = TEAL_VERSION) -> Expr:
+    return _compile(version)[0]
 
 
 def clear_state_program(version: int = TEAL_VERSION) -> Expr:
-    router = build_router()
-    if hasattr(router, "clear_state"):
-        return router.clear_state
-    compiled = router.compile_program(version=version)
-    if isinstance(compiled, tuple):
-        return compiled[1]
-    if hasattr(compiled, "clear_state_program"):
-        return compiled.clear_state_program
-    return compiled
+    return _compile(version)[1]
@@ -1,5 +1,7 @@
 """Intent storage contract for AlgoFlow intents."""
 
+from functools import lru_cache
+
 from pyteal import (
     And,
     App,
@@ -10,6 +12,9 @@ from pyteal import (
     Bytes,
     Cond,
     Expr,
+    Extract,
+    ExtractUint64,
+    GetBit,
     Global,
     If,
     Int,
@@ -17,14 +22,13 @@ from pyteal import (
     Len,
     OnComplete,
     OnCompleteAction,
+    OptimizeOptions,
     Or,
-    Pop,
     Reject,
     Return,
     Router,
     ScratchVar,
     Seq,
-    Subroutine,
     TealType,
     Txn,
     TxnField,
@@ -46,7 +50,12 @@ from ..common.expressions import (
 
 TEAL_VERSION = 8
 
+# Applied by compile_contracts.py and deploy_app.py when they compile the
+# expressions below; frame pointers follow PyTeal's per-version default.
+OPTIMIZE_OPTIONS = OptimizeOptions(scratch_slots=True)
+
 
+@lru_cache(maxsize=None)
 def build_router() -> Router:
     owner_key = g_owner_key()
     keeper_key = g_keeper_key()
@@ -115,6 +124,7 @@ def build_router() -> Router:
         output: abi.Uint64,
     ) -> Expr:
         next_id = ScratchVar(TealType.uint64)
+        id_bytes = ScratchVar(TealType.bytes)
         encoded_intent = ScratchVar(TealType.bytes)
         record = abi_types.IntentRecord()
         owner_addr = abi.Address()
@@ -131,6 +141,7 @@ def build_router() -> Router:
             payments.ensure_collateral_payment(collateral_value.load()),
             next_id.store(App.globalGet(next_intent_key)),
             App.globalPut(next_intent_key, next_id.load() + Int(1)),
+            id_bytes.store(Itob(next_id.load())),
             owner_addr.set(Txn.sender()),
             keeper_addr.set(
                 If(keeper_override.get() == Global.zero_address())
@@ -153,10 +164,10 @@ def build_router() -> Router:
                 app_asa_id,
             ),
             encoded_intent.store(record.encode()),
-            write_box(layout.intent_box_key(next_id.load()), encoded_intent.load()),
+            write_box(layout.intent_box_key_from_bytes(id_bytes.load()), encoded_intent.load()),
             output.set(next_id.load()),
             events.log_intent_created(
-                Itob(next_id.load()),
+                id_bytes.load(),
                 owner_addr.get(),
                 workflow_version.encode(),
             ),
@@ -173,80 +184,55 @@ def build_router() -> Router:
         owner_field = abi.Address()
         keeper_field = abi.Address()
         current_status = abi.Uint64()
-        collateral = abi.Uint64()
-        workflow_hash = abi_types.new_static_bytes32()
-        workflow_blob = abi.DynamicBytes()
-        version_field = abi.Uint64()
-        trigger_field = abi.DynamicBytes()
-        escrow_field = abi.Uint64()
-        asa_field = abi.Uint64()
-        encoded = ScratchVar(TealType.bytes)
-        new_record = abi_types.IntentRecord()
-        current_status_int = ScratchVar(TealType.uint64)
-        new_status_int = ScratchVar(TealType.uint64)
-        executor_addr = ScratchVar(TealType.bytes)
-        executor_param = AppParam.address(App.globalGet(executor_key))
-
-        key = layout.intent_box_key(intent_id.get())
-        box_value = App.box_get(key)
+        executor_app = ScratchVar(TealType.uint64)
+        executor_param = AppParam.address(executor_app.load())
+        id_bytes = ScratchVar(TealType.bytes)
+        box_key = ScratchVar(TealType.bytes)
+        box_value = App.box_get(box_key.load())
 
         return Seq(
+            id_bytes.store(intent_id.encode()),
+            box_key.store(layout.intent_box_key_from_bytes(id_bytes.load())),
             box_value,
-            executor_param,
-            new_status_int.store(new_status.get()),
-            Assert(new_status_int.load() >= Int(constants.INTENT_STATUS_ACTIVE)),
-            Assert(new_status_int.load() <= Int(constants.INTENT_STATUS_CANCELLED)),
+            Assert(new_status.get() >= Int(constants.INTENT_STATUS_ACTIVE)),
+            Assert(new_status.get() <= Int(constants.INTENT_STATUS_CANCELLED)),
             Assert(box_value.hasValue()),
             stored_record.decode(box_value.value()),
             stored_record.owner.store_into(owner_field),
             stored_record.keeper.store_into(keeper_field),
             stored_record.status.store_into(current_status),
-            stored_record.collateral.store_into(collateral),
-            stored_record.workflow_hash.store_into(workflow_hash),
-            stored_record.workflow_blob.store_into(workflow_blob),
-            stored_record.version.store_into(version_field),
-            stored_record.trigger_condition.store_into(trigger_field),
-            stored_record.app_escrow_id.store_into(escrow_field),
-            stored_record.app_asa_id.store_into(asa_field),
-            current_status_int.store(current_status.get()),
-            If(executor_param.hasValue())
-            .Then(executor_addr.store(executor_param.value()))
-            .Else(executor_addr.store(Bytes(""))),
-            Assert(
-                Or(
-                    Txn.sender() == owner_field.get(),
-                    Txn.sender() == keeper_field.get(),
-                    And(
-                        App.globalGet(executor_key) != Int(0),
-                        executor_param.hasValue(),
-                        Txn.sender() == executor_addr.load(),
-                    ),
+            # Or/And evaluate every operand in TEAL, so the executor app's
+            # address is only looked up when the sender is neither the owner
+            # nor the keeper.
+            If(
+                And(
+                    Txn.sender() != owner_field.get(),
+                    Txn.sender() != keeper_field.get(),
+                )
+            ).Then(
+                Seq(
+                    executor_app.store(App.globalGet(executor_key)),
+                    Assert(executor_app.load() != Int(0)),
+                    executor_param,
+                    Assert(executor_param.hasValue()),
+                    Assert(Txn.sender() == executor_param.value()),
                 )
             ),
             Assert(
                 valid_status_transition(
-                    current_status_int.load(), new_status_int.load()
+                    current_status.get(), new_status.get()
                 )
             ),
-            new_record.set(
-                owner_field,
-                collateral,
-                workflow_hash,
-                new_status,
-                workflow_blob,
-                keeper_field,
-                version_field,
-                trigger_field,
-                escrow_field,
-                asa_field,
+            # Only the fixed-width status changes, so overwrite its 8 bytes in
+            # place rather than re-encoding the record and its dynamic tails.
+            App.box_replace(
+                box_key.load(), Int(abi_types.INTENT_RECORD_STATUS_OFFSET), new_status.encode()
             ),
-            encoded.store(new_record.encode()),
-            write_box(key, encoded.load()),
             events.log_intent_status(
-                intent_id.encode(), new_status.encode(), Txn.sender()
+                id_bytes.load(), new_status.encode(), Txn.sender()
             ),
             events.log_execution_result(
-                intent_id.encode(), new_status.encode(), detail.get()
+                id_bytes.load(), new_status.encode(), detail.get()
             ),
             Approve(),
         )
@@ -280,75 +266,52 @@ def build_router() -> Router:
         *,
         output: abi.Uint64,
     ) -> Expr:
-        stored_record = abi_types.IntentRecord()
-        owner_field = abi.Address()
-        keeper_field = abi.Address()
-        status_field = abi.Uint64()
-        collateral = abi.Uint64()
-        workflow_hash = abi_types.new_static_bytes32()
-        workflow_blob = abi.DynamicBytes()
-        version_field = abi.Uint64()
-        trigger_field = abi.DynamicBytes()
-        escrow_field = abi.Uint64()
-        asa_field = abi.Uint64()
-        new_record = abi_types.IntentRecord()
-        encoded = ScratchVar(TealType.bytes)
-        receiver_addr = abi.Address()
+        owner_addr = ScratchVar(TealType.bytes)
+        status_value = ScratchVar(TealType.uint64)
         collateral_int = ScratchVar(TealType.uint64)
-        status_int = ScratchVar(TealType.uint64)
-
-        key = layout.intent_box_key(intent_id.get())
-        box_value = App.box_get(key)
+        id_bytes = ScratchVar(TealType.bytes)
+        box_key = ScratchVar(TealType.bytes)
+        box_value = App.box_get(box_key.load())
 
         return Seq(
+            id_bytes.store(intent_id.encode()),
+            box_key.store(layout.intent_box_key_from_bytes(id_bytes.load())),
             box_value,
             Assert(box_value.hasValue()),
-            stored_record.decode(box_value.value()),
-            stored_record.owner.store_into(owner_field),
-            stored_record.keeper.store_into(keeper_field),
-            stored_record.status.store_into(status_field),
-            stored_record.collateral.store_into(collateral),
-            stored_record.workflow_hash.store_into(workflow_hash),
-            stored_record.workflow_blob.store_into(workflow_blob),
-            stored_record.version.store_into(version_field),
-            stored_record.trigger_condition.store_into(trigger_field),
-            stored_record.app_escrow_id.store_into(escrow_field),
-            stored_record.app_asa_id.store_into(asa_field),
-            validation.ensure_owner(Txn.sender(), owner_field.get()),
-            status_int.store(status_field.get()),
+            # Every field read here is fixed-width in the record head, so it
+            # is sliced straight out of the box bytes rather than decoded.
+            owner_addr.store(
+                Extract(box_value.value(), Int(abi_types.INTENT_RECORD_OWNER_OFFSET), Int(32))
+            ),
+            status_value.store(
+                ExtractUint64(box_value.value(), Int(abi_types.INTENT_RECORD_STATUS_OFFSET))
+            ),
+            collateral_int.store(
+                ExtractUint64(box_value.value(), Int(abi_types.INTENT_RECORD_COLLATERAL_OFFSET))
+            ),
+            validation.ensure_owner(Txn.sender(), owner_addr.load()),
             Assert(
                 Or(
-                    status_int.load() == Int(constants.INTENT_STATUS_SUCCESS),
-                    status_int.load() == Int(constants.INTENT_STATUS_FAILED),
-                    status_int.load() == Int(constants.INTENT_STATUS_CANCELLED),
+                    status_value.load() == Int(constants.INTENT_STATUS_SUCCESS),
+                    status_value.load() == Int(constants.INTENT_STATUS_FAILED),
+                    status_value.load() == Int(constants.INTENT_STATUS_CANCELLED),
                 )
             ),
-            collateral_int.store(collateral.get()),
             validation.ensure_nonzero(collateral_int.load()),
-            receiver_addr.set(
+            send_payment(
                 If(recipient.get() == Global.zero_address())
-                .Then(owner_field.get())
-                .Else(recipient.get())
+                .Then(owner_addr.load())
+                .Else(recipient.get()),
+                collateral_int.load(),
             ),
-            send_payment(receiver_addr.get(), collateral_int.load()),
-            collateral.set(Int(0)),
-            new_record.set(
-                owner_field,
-                collateral,
-                workflow_hash,
-                status_field,
-                workflow_blob,
-                keeper_field,
-                version_field,
-                trigger_field,
-                escrow_field,
-                asa_field,
+            App.box_replace(
+                box_key.load(),
+                Int(abi_types.INTENT_RECORD_COLLATERAL_OFFSET),
+                Bytes("base16", "0000000000000000"),
             ),
-            encoded.store(new_record.encode()),
-            write_box(key, encoded.load()),
             output.set(collateral_int.load()),
             events.log_intent_status(
-                intent_id.encode(), status_field.encode(), Txn.sender()
+                id_bytes.load(), Itob(status_value.load()), Txn.sender()
             ),
             Approve(),
         )
@@ -356,50 +319,39 @@ def build_router() -> Router:
     return router
 
 
-@Subroutine(TealType.none)
 def owner_assert(owner_key: Expr) -> Expr:
     return Seq(validation.ensure_owner(Txn.sender(), App.globalGet(owner_key)), Approve())
 
 
-@Subroutine(TealType.none)
+# box_put creates a missing box sized to ``value`` and rejects a size change on
+# an existing one, so neither a box_get probe nor an explicit box_create is
+# needed. ``value`` is read twice and should be a scratch load.
 def write_box(key: Expr, value: Expr) -> Expr:
-    length = ScratchVar(TealType.uint64)
-    existing = App.box_get(key)
     return Seq(
-        length.store(Len(value)),
-        Assert(length.load() <= Int(constants.MAX_WORKFLOW_BYTES_LITERAL)),
-        existing,
-        If(existing.hasValue())
-        .Then(App.box_put(key, value))
-        .Else(
-            Seq(Pop(App.box_create(key, length.load())), App.box_put(key, value))
-        ),
+        Assert(Len(value) <= Int(constants.MAX_WORKFLOW_BYTES_LITERAL)),
+        App.box_put(key, value),
     )
 
 
-@Subroutine(TealType.uint64)
+# Allowed (current, new) status pairs packed into one uint64: bit
+# ``current * 8 + new`` is set when the transition is permitted. Statuses run
+# 1..5, so every pair maps to its own bit below 48.
+STATUS_TRANSITION_MASK = sum(
+    1 << (current * 8 + new)
+    for current, new in [
+        *((code, code) for code in constants.INTENT_STATUS_NAMES),
+        (constants.INTENT_STATUS_ACTIVE, constants.INTENT_STATUS_EXECUTING),
+        (constants.INTENT_STATUS_ACTIVE, constants.INTENT_STATUS_CANCELLED),
+        (constants.INTENT_STATUS_EXECUTING, constants.INTENT_STATUS_SUCCESS),
+        (constants.INTENT_STATUS_EXECUTING, constants.INTENT_STATUS_FAILED),
+    ]
+)
+
+
 def valid_status_transition(current_status: Expr, new_status: Expr) -> Expr:
-    allowed = Or(
-        current_status == new_status,
-        And(
-            current_status == Int(constants.INTENT_STATUS_ACTIVE),
-            Or(
-                new_status == Int(constants.INTENT_STATUS_EXECUTING),
-                new_status == Int(constants.INTENT_STATUS_CANCELLED),
-            ),
-        ),
-        And(
-            current_status == Int(constants.INTENT_STATUS_EXECUTING),
-            Or(
-                new_status == Int(constants.INTENT_STATUS_SUCCESS),
-                new_status == Int(constants.INTENT_STATUS_FAILED),
-            ),
-        ),
-    )
-    return If(allowed, Int(1), Int(0))
+    return GetBit(Int(STATUS_TRANSITION_MASK), current_status * Int(8) + new_status)
 
 
-@Subroutine(TealType.none)
 def send_payment(receiver: Expr, amount: Expr) -> Expr:
     return Seq(
         InnerTxnBuilder.Begin(),
@@ -415,18 +367,21 @@ def send_payment(receiver: Expr, amount: Expr) -> Expr:
     )
 
 
-def approval_program(version: int = TEAL_VERSION) -> Expr:
+@lru_cache(maxsize=None)
+def _compile(version: int) -> tuple[Expr, Expr]:
+    """Build the approval and clear-state expressions once per TEAL version."""
     router = build_router()
     if hasattr(router, "approval_ast"):
         approval_expr = router.approval_ast.program_construction()
+        clear_expr = router.clear_state
     else:
         compiled = router.compile_program(version=version)
         if isinstance(compiled, tuple):
-            approval_expr = compiled[0]
+            approval_expr, clear_expr = compiled[0], compiled[1]
         elif hasattr(compiled, "approval_program"):
-            approval_expr = compiled.approval_program
+            approval_expr, clear_expr = compiled.approval_program, compiled.clear_state_program
         else:
-            approval_expr = compiled
+            approval_expr = clear_expr = compiled
 
     create_action = router.bare_call_actions.no_op.action
     delete_action = router.bare_call_actions.delete_application.action
@@ -439,7 +394,7 @@ def approval_program(version: int = TEAL_VERSION) -> Expr:
         [Int(1), Reject()],
     )
 
-    return Seq(
+    approval = Seq(
         If(Txn.application_args.length() == Int(0)).Then(
             Seq(
                 bare_dispatch,
@@ -448,15 +403,12 @@ def approval_program(version: int = TEAL_VERSION) -> Expr:
         ),
         approval_expr,
     )
+    return approval, clear_expr
+
+
+def approval_program(version: int = TEAL_VERSION) -> Expr:
+    return _compile(version)[0]
 
 
 def clear_state_program(version: int = TEAL_VERSION) -> Expr:
-    router = build_router()
-    if hasattr(router, "clear_state"):
-        return router.clear_state
-    compiled = router.compile_program(version=version)
-    if isinstance(compiled, tuple):
-        return compiled[1]
-    if hasattr(compiled, "clear_state_program"):
-        return compiled.clear_state_program
-    return compiled
+    return _compile(version)[1]
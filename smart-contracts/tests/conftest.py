@@ -5,7 +5,7 @@ from pathlib import Path
 
 TESTS_ROOT = Path(__file__).resolve().parents[1]
 SRC_PATH = TESTS_ROOT / "src"
-if str(TESTS_ROOT) not in sys.path:
-    sys.path.insert(0, str(TESTS_ROOT))
-if str(SRC_PATH) not in sys.path:
-    sys.path.insert(0, str(SRC_PATH))
+# src/ keeps precedence over the project root, as with the previous
+# insert-each-at-front order.
+_known = set(sys.path)
+sys.path[:0] = [str(path) for path in (SRC_PATH, TESTS_ROOT) if str(path) not in _known]
@@ -1,5 +1,6 @@
 import argparse
 import base64
+import hashlib
 from types import SimpleNamespace
 
 from algosdk import account, encoding
@@ -160,3 +161,102 @@ def test_execution_cli_delegates_to_run_execute(monkeypatch):
     execution_cli.main(["42"])
 
     assert captured["intent_id"] == 42
+
+
+def test_global_state_reads_use_indexed_state(sample_addresses):
+    keeper_addr = sample_addresses[1]
+    global_state = [
+        {
+            "key": base64.b64encode(constants.G_KEEPER_LITERAL).decode(),
+            "value": {"type": 1, "bytes": base64.b64encode(encoding.decode_address(keeper_addr)).decode()},
+        },
+        {
+            "key": base64.b64encode(constants.G_NEXT_INTENT_LITERAL).decode(),
+            "value": {"type": 2, "uint": 12},
+        },
+    ]
+    state_index = intent_submission._index_state(global_state)
+    keys = intent_submission._KEY_B64
+
+    assert intent_submission._read_global_address(state_index, keys["G_KEEPER_LITERAL"]) == keeper_addr
+    assert intent_submission._read_global_uint(state_index, keys["G_NEXT_INTENT_LITERAL"]) == 12
+    assert intent_submission._read_global_uint(state_index, keys["G_FEE_SPLIT_BPS_LITERAL"]) == 0
+    assert intent_submission._read_global_address(state_index, keys["G_NEXT_INTENT_LITERAL"]) == ""
+
+
+def test_build_intent_template_reuses_encoded_workflow(sample_addresses):
+    recipient_addr = sample_addresses[2]
+    steps = intent_submission.basic_transfer_workflow(recipient_addr, asset_id=5, amount=10)
+
+    first = intent_submission.build_intent_template(steps=steps, collateral_microalgo=1)
+    hits = intent_submission._encode_workflow.cache_info().hits
+    second = intent_submission.build_intent_template(steps=list(steps), collateral_microalgo=2)
+
+    assert intent_submission._encode_workflow.cache_info().hits == hits + 1
+    assert second.workflow_blob == first.workflow_blob
+    assert second.workflow_hash == intent_submission.compute_workflow_hash(first.workflow_blob)
+
+
+def test_ensure_app_configs_submits_single_group(monkeypatch, sample_addresses):
+    sender_addr, keeper_addr, _ = sample_addresses
+    executions = []
+
+    class GroupComposer(FakeComposer):
+        def execute(self, client, wait_rounds):
+            executions.append(len(self.method_calls))
+            return SimpleNamespace(tx_ids=[f"TX-{index}" for index in range(len(self.method_calls))])
+
+    composer = GroupComposer()
+    monkeypatch.setattr(intent_submission, "AtomicTransactionComposer", lambda: composer)
+    monkeypatch.setattr(intent_submission, "_fetch_app_params", lambda client, app_id: {"global-state": []})
+    monkeypatch.setattr(intent_submission, "_get_router_method", lambda name, contract=None: contract)
+
+    config = intent_submission.IntentConfig(
+        storage_app_id=1,
+        execution_app_id=2,
+        min_collateral=100_000,
+        keeper_address=keeper_addr,
+    )
+    txids = intent_submission.ensure_app_configs(FakeClient(0, b"", ""), sender_addr, object(), config)
+
+    assert executions == [2]
+    assert [call["method"] for call in composer.method_calls] == ["intent_storage", "execution"]
+    assert txids == ("TX-0", "TX-1")
+
+
+def test_build_workflow_blob_matches_abi_encoder(sample_addresses):
+    recipient_bytes = encoding.decode_address(sample_addresses[2])
+    steps = [
+        intent_submission.WorkflowStepSpec(1, 2, 3, 4, 5, 6, recipient_bytes),
+        intent_submission.WorkflowStepSpec(2**64 - 1, 0, 7, 8, 0, 10_000, b""),
+        intent_submission.WorkflowStepSpec(4, 0, 0, 0, 10, 0, b"extra-payload"),
+    ]
+    for candidate in (steps, steps[:1], []):
+        expected = intent_submission.build_workflow_blob(candidate, use_abi_encoder=True)
+        assert intent_submission.build_workflow_blob(candidate) == expected
+
+
+def test_compute_workflow_hash_matches_hashlib():
+    for blob in (b"", b"\x00\x01", bytes(range(256)) * 3):
+        assert intent_submission.compute_workflow_hash(blob) == hashlib.sha256(blob).digest()
+
+
+def test_load_env_returns_independent_copies(monkeypatch):
+    monkeypatch.setenv("ALGOD_ADDRESS", "http://localhost:4001")
+    intent_submission._cached_env.cache_clear()
+    first = intent_submission.load_env()
+    first["ALGOD_ADDRESS"] = "http://tampered"
+    assert intent_submission.load_env()["ALGOD_ADDRESS"] == "http://localhost:4001"
+    intent_submission._cached_env.cache_clear()
+
+
+@pytest.mark.parametrize("has_sha256", [True, False])
+def test_sha256_selection_uses_stringzilla_only_when_it_ships_sha256(monkeypatch, has_sha256):
+    def fake_sha256(data):
+        return b"stringzilla:" + data
+
+    fake_module = SimpleNamespace(sha256=fake_sha256) if has_sha256 else SimpleNamespace()
+    monkeypatch.setattr(intent_submission.importlib.util, "find_spec", lambda name: object())
+    monkeypatch.setattr(intent_submission.importlib, "import_module", lambda name: fake_module)
+    expected = fake_sha256 if has_sha256 else intent_submission._hashlib_sha256
+    assert intent_submission._select_sha256() is expected
@@ -3,9 +3,15 @@
 from hashlib import sha256
 
 from algosdk.abi import ABIType
-from pyteal import Mode, OptimizeOptions, compileTeal
+from pyteal import Int, Itob, Len, Mode, OptimizeOptions, Return, compileTeal
 
-from algo_flow_contracts.common import constants, opcodes, triggers  # type: ignore[import-not-found]
+from algo_flow_contracts.common import abi_types, constants, layout, opcodes, triggers  # type: ignore[import-not-found]
+
+STEP_ARRAY_TYPE = ABIType.from_string("(uint64,uint64,uint64,uint64,uint64,uint64,byte[])[]")
+INTENT_RECORD_TYPE = ABIType.from_string(
+    "(address,uint64,byte[32],uint64,byte[],address,uint64,byte[],uint64,uint64)"
+)
+TRIGGER_TYPE = ABIType.from_string("(uint64,uint64,byte[],uint64,uint64)")
 
 
 def test_opcodes_mapping_covers_known_operations():
@@ -21,14 +27,15 @@ def test_opcodes_mapping_covers_known_operations():
     }
 
 
+def test_trigger_comparators_are_bounded_from_zero():
+    assert (triggers.COMPARATOR_GTE, triggers.COMPARATOR_LTE) == (0, 1)
+
+
 def test_constants_fee_bounds_respected():
     assert constants.MAX_KEEPER_FEE_BPS <= constants.KEEPER_FEE_SCALE
 
 
 def test_workflow_plan_encoding_roundtrip_includes_reverse_ops():
-    step_array_type = ABIType.from_string(
-        "(uint64,uint64,uint64,uint64,uint64,uint64,byte[])[]"
-    )
     steps = [
         (
             opcodes.OPCODE_SWAP,
@@ -67,8 +74,8 @@ def test_workflow_plan_encoding_roundtrip_includes_reverse_ops():
             b"unstake",
         ),
     ]
-    encoded = step_array_type.encode(steps)
-    decoded = step_array_type.decode(encoded)
+    encoded = STEP_ARRAY_TYPE.encode(steps)
+    decoded = STEP_ARRAY_TYPE.decode(encoded)
     normalized = [
         (item[0], item[1], item[2], item[3], item[4], item[5], bytes(item[6]))
         for item in decoded
@@ -78,8 +85,19 @@ def test_workflow_plan_encoding_roundtrip_includes_reverse_ops():
     assert len(plan_hash) == 32
 
 
+def test_intent_record_offsets_match_encoding():
+    encoded = INTENT_RECORD_TYPE.encode(
+        [bytes(range(32)), 1_234_567, bytes(32), constants.INTENT_STATUS_EXECUTING, b"plan", bytes(32), 1, b"", 0, 0]
+    )
+    owner_at = abi_types.INTENT_RECORD_OWNER_OFFSET
+    collateral_at = abi_types.INTENT_RECORD_COLLATERAL_OFFSET
+    status_at = abi_types.INTENT_RECORD_STATUS_OFFSET
+    assert encoded[owner_at : owner_at + 32] == bytes(range(32))
+    assert int.from_bytes(encoded[collateral_at : collateral_at + 8], "big") == 1_234_567
+    assert int.from_bytes(encoded[status_at : status_at + 8], "big") == constants.INTENT_STATUS_EXECUTING
+
+
 def test_trigger_config_roundtrip_with_oracle_fields():
-    trigger_type = ABIType.from_string("(uint64,uint64,byte[],uint64,uint64)")
     config = (
         triggers.TRIGGER_TYPE_PRICE_THRESHOLD,
         21321231231,
@@ -87,8 +105,8 @@ def test_trigger_config_roundtrip_with_oracle_fields():
         triggers.COMPARATOR_GTE,
         1_500_000,
     )
-    encoded = trigger_type.encode(config)
-    decoded = trigger_type.decode(encoded)
+    encoded = TRIGGER_TYPE.encode(config)
+    decoded = TRIGGER_TYPE.decode(encoded)
     comparable = (
         decoded[0],
         decoded[1],
@@ -98,3 +116,17 @@ def test_trigger_config_roundtrip_with_oracle_fields():
     )
     assert comparable == config
 
+
+
+def test_intent_box_key_from_bytes_matches_uint_key():
+    def compile_len(key):
+        return compileTeal(
+            Return(Len(key)),
+            mode=Mode.Application,
+            version=8,
+            optimize=OptimizeOptions(scratch_slots=True),
+        )
+
+    assert compile_len(layout.intent_box_key(Int(7))) == compile_len(
+        layout.intent_box_key_from_bytes(Itob(Int(7)))
+    )
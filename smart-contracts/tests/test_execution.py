@@ -1,29 +1,31 @@
 """Deep coverage tests for the execution router contract."""
 
-import os
-import sys
-
+import pytest
 from pyteal import (
     Approve,
     Bytes,
+    Concat,
     Global,
     Int,
+    Itob,
+    Log,
     Mode,
     OptimizeOptions,
     Pop,
     Return,
+    ScratchVar,
     Seq,
+    TealType,
+    Txn,
     compileTeal,
 )
+from algosdk.abi import ABIType
 
-TEST_ROOT = os.path.dirname(__file__)
-SRC_ROOT = os.path.join(os.path.dirname(TEST_ROOT), "src")
-if SRC_ROOT not in sys.path:  # pragma: no cover - import hook
-    sys.path.append(SRC_ROOT)
-
-from algo_flow_contracts.common import opcodes, triggers  # type: ignore[import-not-found]
+from algo_flow_contracts.common import constants, opcodes, triggers  # type: ignore[import-not-found]
 from algo_flow_contracts.common.abi_types import WorkflowStep  # type: ignore[import-not-found]
 from algo_flow_contracts.execution.contract import (  # type: ignore[import-not-found]
+    OPTIMIZE_OPTIONS,
+    SLIPPAGE_NARROW_LIMIT,
     amount_after_slippage,
     approval_program,
     build_router,
@@ -35,8 +37,13 @@ from algo_flow_contracts.execution.contract import (  # type: ignore[import-not-
     transfer_step,
     transfer_to_pool,
     validate_trigger,
+    walk_execution_plan,
 )
 
+# PyTeal expressions are immutable, so one node can be shared by every test.
+APP_ADDRESS = Global.current_application_address()
+WORKFLOW_PLAN_ABI = ABIType.from_string("(uint64,uint64,uint64,uint64,uint64,uint64,byte[])[]")
+
 
 def _compile(expr):
     return compileTeal(
@@ -51,31 +58,221 @@ def _compile_return(expr):
     return _compile(Seq(Pop(expr), Return(Int(1))))
 
 
-def test_router_methods_present():
-    router = build_router()
+class _TealReject(Exception):
+    """Raised by ``_run_teal`` when the program errs, fails an assert or rejects."""
+
+
+_UINT64_MAX = 2**64 - 1
+_BINARY_OPS = {
+    "+": lambda a, b: a + b,
+    "*": lambda a, b: a * b,
+    "<": lambda a, b: int(a < b),
+    ">": lambda a, b: int(a > b),
+    "==": lambda a, b: int(a == b),
+    "&&": lambda a, b: int(bool(a) and bool(b)),
+}
+
+
+def _run_teal(teal, arg):
+    """Evaluate the few opcodes the plan walk compiles to and return the logs.
+
+    There is no AVM here, so this stands in for a dry run of the walk alone.
+    """
+    lines = [line.split() for line in teal.splitlines()[1:] if line]
+    labels = {line[0][:-1]: pc for pc, line in enumerate(lines) if line[0].endswith(":")}
+    stack, scratch, logs, pc = [], {}, [], 0
+    while pc < len(lines):
+        op, *imm = lines[pc]
+        pc += 1
+        if op.endswith(":"):
+            continue
+        if op == "int":
+            stack.append(int(imm[0]))
+        elif op == "txna":
+            stack.append(arg)
+        elif op == "store":
+            scratch[imm[0]] = stack.pop()
+        elif op == "load":
+            stack.append(scratch[imm[0]])
+        elif op in _BINARY_OPS:
+            b, a = stack.pop(), stack.pop()
+            result = _BINARY_OPS[op](a, b)
+            if result > _UINT64_MAX:
+                raise _TealReject(f"{op} overflow")
+            stack.append(result)
+        elif op in ("extract_uint16", "extract_uint64", "extract3"):
+            if op == "extract3":
+                length = stack.pop()
+            else:
+                length = 2 if op == "extract_uint16" else 8
+            start, data = stack.pop(), stack.pop()
+            if start + length > len(data):
+                raise _TealReject(f"{op} out of range")
+            chunk = data[start:start + length]
+            stack.append(chunk if op == "extract3" else int.from_bytes(chunk, "big"))
+        elif op == "len":
+            stack.append(len(stack.pop()))
+        elif op == "itob":
+            stack.append(stack.pop().to_bytes(8, "big"))
+        elif op == "concat":
+            b, a = stack.pop(), stack.pop()
+            stack.append(a + b)
+        elif op == "log":
+            logs.append(stack.pop())
+        elif op == "assert":
+            if not stack.pop():
+                raise _TealReject(f"assert failed before line {pc}")
+        elif op in ("bz", "bnz"):
+            if bool(stack.pop()) == (op == "bnz"):
+                pc = labels[imm[0]]
+        elif op == "b":
+            pc = labels[imm[0]]
+        elif op == "return":
+            if not stack.pop():
+                raise _TealReject("rejected")
+            return logs
+        else:
+            raise AssertionError(f"unsupported opcode {op}")
+    raise _TealReject("fell off the end")
+
+
+@pytest.fixture(scope="module")
+def plan_walk_teal():
+    plan = ScratchVar(TealType.bytes)
+    return _compile(
+        Seq(
+            plan.store(Txn.application_args[0]),
+            walk_execution_plan(plan, lambda *fields: Log(Concat(Itob(fields[0]), fields[6]))),
+            Approve(),
+        )
+    )
+
+
+def _encode_plan(*steps):
+    return WORKFLOW_PLAN_ABI.encode([[opcode, 0, 0, 0, 0, 0, extra] for opcode, extra in steps])
+
+
+@pytest.fixture(scope="module")
+def router():
+    return build_router()
+
+
+@pytest.fixture(scope="module")
+def approval_teal():
+    return _compile(approval_program())
+
+
+def test_router_methods_present(router):
     method_names = {method.name for method in router.methods}
     assert {"configure", "execute_intent"}.issubset(method_names)
 
 
-def test_execution_approval_compiles():
-    teal = _compile(approval_program())
-    assert "execute_intent" in teal
-    assert "#pragma version 8" in teal
+def test_execution_approval_compiles(approval_teal):
+    assert "execute_intent" in approval_teal
+    assert "#pragma version 8" in approval_teal
 
 
-def test_execution_approval_contains_key_operations():
-    teal = _compile(approval_program())
-    assert "sha256" in teal
-    assert "itxn_begin" in teal
-    assert "app_global_get_ex" in teal
-    assert "wideratio" in teal or ("mulw" in teal and "divmodw" in teal)
+def test_execution_approval_contains_key_operations(approval_teal):
+    assert "sha256" in approval_teal
+    assert "itxn_begin" in approval_teal
+    assert "app_global_get_ex" in approval_teal
+    assert "wideratio" in approval_teal or ("mulw" in approval_teal and "divmodw" in approval_teal)
 
 
-def test_execution_approval_dispatches_new_workflow_steps():
-    teal = _compile(approval_program())
-    assert "callsub swapstep" in teal
-    assert "callsub provideliquiditystep" in teal
-    assert "callsub transferstep" in teal
+def test_execution_approval_dispatches_new_workflow_steps(approval_teal):
+    assert "callsub poolstep" in approval_teal
+    assert "byte 0x" + b"swap".hex() in approval_teal
+    assert "byte 0x" + b"add_liquidity".hex() in approval_teal
+    assert "callsub transferstep" in approval_teal
+
+
+def test_plan_walk_visits_every_declared_step(plan_walk_teal):
+    plan = _encode_plan((1, b"first"), (3, b""), (2, b"x" * 40))
+    assert _run_teal(plan_walk_teal, plan) == [
+        (1).to_bytes(8, "big") + b"first",
+        (3).to_bytes(8, "big"),
+        (2).to_bytes(8, "big") + b"x" * 40,
+    ]
+
+
+def test_plan_walk_rejects_step_bodies_past_the_declared_length(plan_walk_teal):
+    one_step = _encode_plan((1, b"shown"))
+    hidden_step = _encode_plan((3, b"hidden"))[4:]
+    # The header still declares one step, so the appended body would run unseen.
+    with pytest.raises(_TealReject):
+        _run_teal(plan_walk_teal, one_step + hidden_step)
+
+
+def test_plan_walk_rejects_truncated_and_empty_plans(plan_walk_teal):
+    plan = _encode_plan((1, b"first"), (2, b"second"))
+    for blob in (plan[:-1], plan[:30], (0).to_bytes(2, "big")):
+        with pytest.raises(_TealReject):
+            _run_teal(plan_walk_teal, blob)
+
+
+def test_plan_walk_rejects_non_canonical_offsets(plan_walk_teal):
+    plan = bytearray(_encode_plan((1, b"aa"), (2, b"bb")))
+    # Swapped head entries point a decoder at the steps in (2, 1) order,
+    # while the cursor would run them in (1, 2) order.
+    swapped_heads = plan[:2] + plan[4:6] + plan[2:4] + plan[6:]
+    # An extra offset of 51 makes a decoder read ``extra`` one byte later.
+    shifted_extra = plan.copy()
+    shifted_extra[6 + 48:6 + 50] = (51).to_bytes(2, "big")
+    for blob in (swapped_heads, shifted_extra):
+        with pytest.raises(_TealReject):
+            _run_teal(plan_walk_teal, bytes(blob))
+
+
+def test_trivial_helpers_are_inlined(approval_teal):
+    for helper in ("resolveamount", "extractpooladdress"):
+        assert f"callsub {helper}" not in approval_teal
+
+
+def test_program_expressions_are_cached():
+    assert build_router() is build_router()
+    assert approval_program() is approval_program()
+    assert clear_state_program() is clear_state_program()
+    assert _compile(approval_program()) == _compile(approval_program())
+
+
+def test_execution_approval_compiles_with_frame_pointers():
+    teal = compileTeal(
+        approval_program(),
+        mode=Mode.Application,
+        version=8,
+        assembleConstants=True,
+        optimize=OPTIMIZE_OPTIONS,
+    )
+    assert "proto" in teal
+    assert "pushbytes" in teal or "bytecblock" in teal
+
+
+def test_execution_approval_compiles_before_frame_pointers():
+    teal = compileTeal(
+        approval_program(),
+        mode=Mode.Application,
+        version=7,
+        assembleConstants=True,
+        optimize=OPTIMIZE_OPTIONS,
+    )
+    assert "proto" not in teal
+
+
+def test_execution_approval_assembles_shared_constants():
+    teal = compileTeal(
+        approval_program(),
+        mode=Mode.Application,
+        version=8,
+        assembleConstants=True,
+        optimize=OPTIMIZE_OPTIONS,
+    )
+    bytecblock = next(line for line in teal.splitlines() if line.startswith("bytecblock"))
+    for key in (b"g_owner", b"g_storage", b"g_keeper"):
+        assert "0x" + key.hex() in bytecblock
+    pushed = [line for line in teal.splitlines() if line.startswith("pushbytes")]
+    assert all("g_owner" not in line and "g_storage" not in line for line in pushed)
+    intcblock = next(line for line in teal.splitlines() if line.startswith("intcblock"))
+    assert str(constants.KEEPER_FEE_SCALE) in intcblock.split()
 
 
 def test_clear_state_compiles():
@@ -83,14 +280,24 @@ def test_clear_state_compiles():
     assert "int 1" in teal or len(teal) > 0
 
 
-def test_amount_after_slippage_constant_math():
+def test_amount_after_slippage_folds_literals():
     teal = _compile_return(amount_after_slippage(Int(1_000_000), Int(150)))
-    assert "callsub amountafterslippage" in teal
+    assert "int 985000" in teal
+    for op in ("\n*\n", "mulw", "divmodw"):
+        assert op not in teal
+
+
+def test_amount_after_slippage_runtime_math():
+    teal = _compile_return(amount_after_slippage(Txn.fee(), Int(150)))
+    assert "callsub amountafterslippage" not in teal
+    assert f"int {SLIPPAGE_NARROW_LIMIT}" in teal
+    assert "\n*\n" in teal
     assert "mulw" in teal
     assert "divmodw" in teal
 
 
 def test_dispatch_workflow_step_targets_all_subroutines():
+    # dispatch_workflow_step is a subroutine, so one call site emits every arm.
     teal = _compile(
         Seq(
             dispatch_workflow_step(
@@ -101,33 +308,14 @@ def test_dispatch_workflow_step_targets_all_subroutines():
                 Int(4),
                 Int(5),
                 Bytes("a" * 32),
-                Global.current_application_address(),
-            ),
-            dispatch_workflow_step(
-                Int(opcodes.OPCODE_PROVIDE_LIQUIDITY),
-                Int(1),
-                Int(2),
-                Int(3),
-                Int(4),
-                Int(5),
-                Bytes("b" * 32),
-                Global.current_application_address(),
-            ),
-            dispatch_workflow_step(
-                Int(opcodes.OPCODE_TRANSFER),
-                Int(0),
-                Int(0),
-                Int(0),
-                Int(10),
-                Int(0),
-                Bytes("c" * 32),
-                Global.current_application_address(),
+                APP_ADDRESS,
             ),
             Approve(),
         )
     )
-    assert "callsub swapstep" in teal
-    assert "callsub provideliquiditystep" in teal
+    assert "callsub poolstep" in teal
+    assert "byte 0x" + b"swap".hex() in teal
+    assert "byte 0x" + b"add_liquidity".hex() in teal
     assert "callsub transferstep" in teal
 
 
@@ -142,7 +330,7 @@ def test_dispatch_rejects_unknown_opcode():
                 Int(0),
                 Int(0),
                 Bytes(""),
-                Global.current_application_address(),
+                APP_ADDRESS,
             ),
             Approve(),
         )
@@ -153,13 +341,16 @@ def test_dispatch_rejects_unknown_opcode():
 def test_transfer_to_pool_emits_payment_and_asset_paths():
     teal = _compile(
         Seq(
-            transfer_to_pool(Int(0), Int(10), Global.current_application_address()),
-            transfer_to_pool(Int(55), Int(20), Global.current_application_address()),
+            transfer_to_pool(Int(0), Int(10), APP_ADDRESS),
+            transfer_to_pool(Int(55), Int(20), APP_ADDRESS),
             Approve(),
         )
     )
     assert "itxn_field Receiver" in teal
     assert "itxn_field XferAsset" in teal
+    # One begin/submit pair per branch.
+    assert teal.count("itxn_begin") == 2
+    assert teal.count("itxn_submit") == 2
 
 
 def test_swap_step_uses_pool_address_and_inner_call():
@@ -172,14 +363,16 @@ def test_swap_step_uses_pool_address_and_inner_call():
                 Int(1_000),
                 Int(50),
                 Bytes("s" * 32),
-                Global.current_application_address(),
+                APP_ADDRESS,
             ),
             Approve(),
         )
     )
-    assert 'byte "swap"' in teal
+    assert "byte 0x" + b"swap".hex() in teal
     assert "extract 0 32" in teal
     assert "itxn_field Accounts" in teal
+    assert "itxn_next" in teal
+    assert "callsub transfertopool" not in teal
 
 
 def test_provide_liquidity_step_uses_pool_address():
@@ -192,16 +385,16 @@ def test_provide_liquidity_step_uses_pool_address():
                 Int(500),
                 Int(25),
                 Bytes("p" * 32),
-                Global.current_application_address(),
+                APP_ADDRESS,
             ),
             Approve(),
         )
     )
-    assert 'byte "add_liquidity"' in teal
+    assert "byte 0x" + b"add_liquidity".hex() in teal
     assert "extract 0 32" in teal
 
 
-def test_transfer_step_tracks_deltas():
+def test_transfer_step_sends_to_recipient():
     teal = _compile(
         Seq(
             transfer_step(Int(9), Int(300), Bytes("t" * 32)),
@@ -210,55 +403,39 @@ def test_transfer_step_tracks_deltas():
     )
     assert "callsub transferto" in teal
     assert "extract 0 32" in teal
+    assert "callsub optinasset" not in teal
+
+
+@pytest.mark.parametrize(
+    "build_step",
+    [
+        lambda: swap_step(
+            Int(77), Int(5), Int(6), Int(0), Int(50), Bytes("s" * 32), APP_ADDRESS
+        ),
+        lambda: provide_liquidity_step(
+            Int(90), Int(1), Int(2), Int(0), Int(25), Bytes("p" * 32), APP_ADDRESS
+        ),
+        lambda: transfer_step(Int(3), Int(0), Bytes("t" * 32)),
+    ],
+    ids=["swap", "provide_liquidity", "transfer"],
+)
+def test_step_amount_zero_reads_balance(build_step):
+    teal = _compile(Seq(build_step(), Approve()))
+    assert "callsub getbalance" in teal
+    assert "asset_holding_get" in teal
 
 
-def test_swap_step_amount_zero_reads_balance():
-    teal = _compile(
-        Seq(
-            swap_step(
-                Int(77),
-                Int(5),
-                Int(6),
-                Int(0),
-                Int(50),
-                Bytes("s" * 32),
-                Global.current_application_address(),
-            ),
-            Approve(),
-        )
-    )
-    lowered = teal.lower()
-    assert "acct_params_get" in lowered or "asset_holding_get" in lowered
-
-
-def test_provide_liquidity_amount_zero_reads_balance():
+def test_algo_balance_reads_use_balance_opcode():
     teal = _compile(
         Seq(
-            provide_liquidity_step(
-                Int(90),
-                Int(1),
-                Int(2),
-                Int(0),
-                Int(25),
-                Bytes("p" * 32),
-                Global.current_application_address(),
-            ),
+            transfer_step(Int(0), Int(0), Bytes("t" * 32)),
             Approve(),
         )
     )
-    lowered = teal.lower()
-    assert "acct_params_get" in lowered or "asset_holding_get" in lowered
+    assert "\nbalance\n" in teal
+    assert "acct_params_get" not in teal
 
 
-def test_transfer_step_amount_zero_reads_balance():
-    teal = _compile(
-        Seq(
-            transfer_step(Int(3), Int(0), Bytes("t" * 32)),
-            Approve(),
-        )
-    )
-    lowered = teal.lower()
-    assert "acct_params_get" in lowered or "asset_holding_get" in lowered
 def test_extract_pool_address_enforces_length():
     teal = _compile(
         Seq(
@@ -302,6 +479,7 @@ def test_validate_trigger_supports_lte_comparator():
     )
     assert "app_global_get_ex" in teal
     assert "<=" in teal or "assert" in teal
+    assert "||" not in teal
 
 
 def test_workflow_step_namedtuple_fields_are_stable():
@@ -317,8 +495,7 @@ def test_workflow_step_namedtuple_fields_are_stable():
     ]
 
 
-def test_router_method_signatures_stable():
-    router = build_router()
+def test_router_method_signatures_stable(router):
     method_signatures = {method.get_signature() for method in router.methods}
     assert "execute_intent(uint64,byte[],byte[],address)void" in method_signatures
     assert "configure(uint64,address,uint64)void" in method_signatures
@@ -1,19 +1,14 @@
 """Comprehensive tests for the intent storage contract build."""
 
 import itertools
-import os
-import sys
 
 import pytest
 from pyteal import Int, Mode, OptimizeOptions, Return, Seq, compileTeal
 
-TEST_ROOT = os.path.dirname(__file__)
-SRC_ROOT = os.path.join(os.path.dirname(TEST_ROOT), "src")
-if SRC_ROOT not in sys.path:  # pragma: no cover - import hook
-    sys.path.append(SRC_ROOT)
-
 from algo_flow_contracts.common import constants, status  # type: ignore[import-not-found]
 from algo_flow_contracts.intent_storage.contract import (  # type: ignore[import-not-found]
+    OPTIMIZE_OPTIONS,
+    STATUS_TRANSITION_MASK,
     approval_program,
     build_router,
     clear_state_program,
@@ -26,6 +21,16 @@ def router():
     return build_router()
 
 
+@pytest.fixture(scope="module")
+def approval_teal():
+    return compileTeal(
+        approval_program(),
+        mode=Mode.Application,
+        version=8,
+        optimize=OptimizeOptions(scratch_slots=True),
+    )
+
+
 def _compile(expr):
     return compileTeal(
         Seq(Return(expr)),
@@ -42,19 +47,19 @@ def _final_int_literal(teal: str) -> int:
     raise AssertionError("unable to locate final int literal in TEAL output")
 
 
+_ALLOWED_TRANSITIONS = frozenset(
+    {(code, code) for code in constants.INTENT_STATUS_NAMES}
+    | {
+        (constants.INTENT_STATUS_ACTIVE, constants.INTENT_STATUS_EXECUTING),
+        (constants.INTENT_STATUS_ACTIVE, constants.INTENT_STATUS_CANCELLED),
+        (constants.INTENT_STATUS_EXECUTING, constants.INTENT_STATUS_SUCCESS),
+        (constants.INTENT_STATUS_EXECUTING, constants.INTENT_STATUS_FAILED),
+    }
+)
+
+
 def _python_valid_status_transition(current_status: int, new_status: int) -> bool:
-    return (
-        current_status == new_status
-        or (
-            current_status == constants.INTENT_STATUS_ACTIVE
-            and new_status
-            in (constants.INTENT_STATUS_EXECUTING, constants.INTENT_STATUS_CANCELLED)
-        )
-        or (
-            current_status == constants.INTENT_STATUS_EXECUTING
-            and new_status in (constants.INTENT_STATUS_SUCCESS, constants.INTENT_STATUS_FAILED)
-        )
-    )
+    return (current_status, new_status) in _ALLOWED_TRANSITIONS
 
 
 def test_expected_methods_present(router):
@@ -71,25 +76,43 @@ def test_expected_methods_present(router):
     assert not missing, f"Missing Router methods: {missing}"
 
 
-def test_approval_compiles():
-    teal = compileTeal(
-        approval_program(),
-        mode=Mode.Application,
-        version=8,
-        optimize=OptimizeOptions(scratch_slots=True),
-    )
-    assert "#pragma version 8" in teal
+def test_program_expressions_are_cached():
+    assert build_router() is build_router()
+    assert approval_program() is approval_program()
+    assert clear_state_program() is clear_state_program()
+
+
+def test_approval_compiles(approval_teal):
+    assert "#pragma version 8" in approval_teal
 
 
-def test_approval_contains_key_operations():
+def test_approval_contains_key_operations(approval_teal):
+    for snippet in ("box_put", "box_get", "log", "app_params_get"):
+        assert snippet in approval_teal
+    # register_intent relies on box_put to create the box.
+    assert "box_create" not in approval_teal
+
+
+def test_intent_box_prefix_is_a_shared_constant():
     teal = compileTeal(
         approval_program(),
         mode=Mode.Application,
         version=8,
-        optimize=OptimizeOptions(scratch_slots=True),
+        assembleConstants=True,
+        optimize=OPTIMIZE_OPTIONS,
     )
-    for snippet in ("box_create", "box_put", "box_get", "log", "app_params_get"):
-        assert snippet in teal
+    bytecblock = next(line for line in teal.splitlines() if line.startswith("bytecblock"))
+    assert "0x" + constants.BOX_PREFIX_INTENT_LITERAL.hex() in bytecblock.split()
+
+
+def test_storage_helpers_are_inlined(approval_teal):
+    for helper in ("ownerassert", "sendpayment", "writebox", "validstatustransition"):
+        assert f"callsub {helper}" not in approval_teal
+
+
+def test_record_updates_rewrite_fields_in_place(approval_teal):
+    # update_intent_status and withdraw_intent each splice one head field.
+    assert approval_teal.count("box_replace") == 2
 
 
 def test_clear_state_compiles():
@@ -109,9 +132,18 @@ def test_valid_status_transition_teal_structure():
             Int(constants.INTENT_STATUS_SUCCESS),
         )
     )
-    assert "bnz" in teal
-    for code in constants.INTENT_STATUS_NAMES:
-        assert f"int {code}" in teal
+    assert "getbit" in teal
+    assert f"int {STATUS_TRANSITION_MASK}" in teal
+    assert "bnz" not in teal
+
+
+def test_status_transition_all_pairs():
+    # Covers every status pair plus unknown codes, which must never be allowed.
+    for current_status, new_status in itertools.product(range(8), repeat=2):
+        bit = (STATUS_TRANSITION_MASK >> (current_status * 8 + new_status)) & 1
+        assert bool(bit) is _python_valid_status_transition(current_status, new_status), (
+            f"{current_status}->{new_status}"
+        )
 
 
 @pytest.mark.parametrize(
@@ -152,21 +184,3 @@ def test_known_status_codes_mapping_complete():
     mapping = status.known_status_codes()
     assert mapping == constants.INTENT_STATUS_NAMES
     assert set(mapping.values()) == {"ACTIVE", "EXECUTING", "SUCCESS", "FAILED", "CANCELLED"}
-
-
-@pytest.mark.parametrize("status_pair", itertools.product(constants.INTENT_STATUS_NAMES, repeat=2))
-def test_status_transition_all_pairs(status_pair):
-    current_status, new_status = status_pair
-    allowed = (
-        current_status == new_status
-        or (
-            current_status == constants.INTENT_STATUS_ACTIVE
-            and new_status
-            in (constants.INTENT_STATUS_EXECUTING, constants.INTENT_STATUS_CANCELLED)
-        )
-        or (
-            current_status == constants.INTENT_STATUS_EXECUTING
-            and new_status in (constants.INTENT_STATUS_SUCCESS, constants.INTENT_STATUS_FAILED)
-        )
-    )
-    assert allowed is _python_valid_status_transition(current_status, new_status)